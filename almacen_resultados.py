@@ -0,0 +1,257 @@
+#-----------------Almacén de Resultados en Disco ---------------------#
+# Almacén persistente y direccionado por contenido para los resultados de
+# los módulos de pozo. A diferencia de st.cache_data, que vive en la memoria
+# de cada proceso, este almacén se guarda en un archivo SQLite compartido, de
+# modo que un diseño calculado en una réplica de la aplicación es un acierto
+# de caché en todas las demás y sobrevive a los reinicios y redespliegues.
+# Solo se guardan resultados que cuesta más calcular que leer: el survey del
+# pozo vertical (bucle punto a punto) y los resúmenes de los pozos J y S
+# (tangente 3D resuelta por Newton); sus surveys vectorizados se regeneran.
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Ruta del archivo SQLite; en despliegues con varias réplicas debe apuntar a
+# un volumen compartido por todos los procesos.
+RUTA_ALMACEN = os.environ.get('WTS_ALMACEN_RUTA', 'resultados_pozos.sqlite3')
+
+# Tamaño máximo del almacén (en bytes) antes de desalojar por LRU
+TAMANO_MAXIMO = int(os.environ.get('WTS_ALMACEN_TAMANO_MAXIMO', 256 * 1024 * 1024))
+
+# Versión del formato de los resultados; incrementarla invalida todas las claves
+# anteriores cuando cambian las fórmulas de cálculo.
+VERSION_ESQUEMA = 7
+
+# Antigüedad mínima (en segundos) de la marca de último acceso antes de
+# actualizarla en un acierto; evita una escritura por cada lectura
+REFRESCO_ACCESO = 60.0
+
+
+def clave_resultado(tipo_pozo, parametros):
+    """
+    Calcula la clave direccionada por contenido de un resultado.
+
+    Parámetros:
+    ----------
+    tipo_pozo : str
+        Identificador del módulo ('pozo_vertical', 'pozo_tipo_j', 'pozo_tipo_s').
+    parametros : dict
+        Parámetros de entrada del cálculo (deben ser serializables a JSON).
+
+    Retorna:
+    --------
+    str:
+        Hash SHA-256 hexadecimal del tipo de pozo y sus parámetros.
+    """
+    contenido = json.dumps(
+        {'version': VERSION_ESQUEMA, 'tipo_pozo': tipo_pozo, 'parametros': parametros},
+        sort_keys=True, default=float
+    )
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def _a_json(valor):
+    # Tipos que json no conoce: DataFrames (columnas numéricas como arreglos
+    # binarios), arreglos y escalares de numpy
+    if isinstance(valor, pd.DataFrame):
+        columnas = []
+        for nombre in valor.columns:
+            serie = valor[nombre]
+            if serie.dtype.kind in 'biuf':
+                datos = np.ascontiguousarray(serie.to_numpy())
+                columnas.append({'nombre': nombre, 'dtype': datos.dtype.str,
+                                 'arreglo': base64.b64encode(datos.tobytes()).decode('ascii')})
+            else:
+                columnas.append({'nombre': nombre, 'lista': serie.tolist()})
+        return {'__dataframe__': columnas}
+    if isinstance(valor, (np.ndarray, np.generic)):
+        return valor.tolist()
+    raise TypeError(f'Tipo no serializable en el almacén: {type(valor).__name__}')
+
+
+def _de_json(objeto):
+    if '__dataframe__' not in objeto:
+        return objeto
+    columnas = {}
+    for columna in objeto['__dataframe__']:
+        if 'arreglo' in columna:
+            dtype = np.dtype(columna['dtype'])
+            if dtype.kind not in 'biuf':
+                raise ValueError(f'Tipo de columna no permitido: {dtype}')
+            columnas[columna['nombre']] = np.frombuffer(base64.b64decode(columna['arreglo']), dtype=dtype)
+        else:
+            columnas[columna['nombre']] = columna['lista']
+    return pd.DataFrame(columnas)
+
+
+def serializar(valor):
+    """
+    Serializa un resultado (diccionarios, números, cadenas y DataFrames) como
+    JSON comprimido. A diferencia de pickle, leer un valor de un archivo
+    compartido nunca ejecuta código.
+    """
+    return zlib.compress(json.dumps(valor, default=_a_json, ensure_ascii=False).encode('utf-8'), 1)
+
+
+def deserializar(datos):
+    """
+    Inverso de `serializar`. Lanza zlib.error, ValueError, KeyError o
+    TypeError si los datos están corruptos.
+    """
+    return json.loads(zlib.decompress(datos).decode('utf-8'), object_hook=_de_json)
+
+
+class AlmacenResultados:
+    """
+    Almacén de resultados respaldado por SQLite con desalojo LRU acotado por tamaño.
+
+    El archivo se abre en modo WAL, lo que permite lecturas concurrentes desde
+    varios procesos mientras otro escribe. Cada hilo usa su propia conexión,
+    ya que Streamlit atiende cada sesión en un hilo distinto.
+
+    Parámetros:
+    ----------
+    ruta : str
+        Ruta del archivo SQLite.
+    tamano_maximo : int
+        Tamaño máximo, en bytes, de los resultados almacenados.
+    """
+
+    def __init__(self, ruta=RUTA_ALMACEN, tamano_maximo=TAMANO_MAXIMO):
+        self.ruta = ruta
+        self.tamano_maximo = tamano_maximo
+        self._local = threading.local()
+        con = self._conexion()
+        con.execute('PRAGMA journal_mode=WAL')
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS resultados (
+                clave TEXT PRIMARY KEY,
+                tipo_pozo TEXT NOT NULL,
+                valor BLOB NOT NULL,
+                tamano INTEGER NOT NULL,
+                ultimo_acceso REAL NOT NULL
+            )
+        """)
+        con.execute('CREATE INDEX IF NOT EXISTS idx_ultimo_acceso ON resultados (ultimo_acceso)')
+
+    def _conexion(self):
+        # Conexión propia de cada hilo, en modo autocommit con transacciones explícitas
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+            con.execute('PRAGMA synchronous=NORMAL')
+            self._local.con = con
+        return con
+
+    def obtener(self, clave):
+        """
+        Devuelve el resultado almacenado bajo `clave`, o None si no existe.
+        Un acierto actualiza la marca de último acceso usada por el desalojo LRU
+        solo si tiene más de `REFRESCO_ACCESO` segundos.
+        """
+        con = self._conexion()
+        fila = con.execute('SELECT valor, ultimo_acceso FROM resultados WHERE clave = ?', (clave,)).fetchone()
+        if fila is None:
+            return None
+        try:
+            valor = deserializar(fila[0])
+        except (zlib.error, ValueError, KeyError, TypeError):
+            # Un resultado corrupto o de un formato desconocido se trata como
+            # un fallo de caché y se elimina para que se vuelva a calcular
+            con.execute('DELETE FROM resultados WHERE clave = ?', (clave,))
+            return None
+        ahora = time.time()
+        if ahora - fila[1] > REFRESCO_ACCESO:
+            con.execute('UPDATE resultados SET ultimo_acceso = ? WHERE clave = ?', (ahora, clave))
+        return valor
+
+    def guardar(self, clave, tipo_pozo, valor):
+        """
+        Guarda `valor` bajo `clave` y desaloja los resultados menos usados
+        recientemente si el almacén supera su tamaño máximo.
+        """
+        datos = serializar(valor)
+        con = self._conexion()
+        con.execute('BEGIN IMMEDIATE')
+        try:
+            con.execute(
+                'INSERT OR REPLACE INTO resultados (clave, tipo_pozo, valor, tamano, ultimo_acceso) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (clave, tipo_pozo, sqlite3.Binary(datos), len(datos), time.time())
+            )
+            self._desalojar(con)
+            con.execute('COMMIT')
+        except Exception:
+            con.execute('ROLLBACK')
+            raise
+
+    def _desalojar(self, con):
+        # Eliminamos los resultados más antiguos hasta quedar dentro del límite
+        total = con.execute('SELECT COALESCE(SUM(tamano), 0) FROM resultados').fetchone()[0]
+        if total <= self.tamano_maximo:
+            return
+        filas = con.execute('SELECT clave, tamano FROM resultados ORDER BY ultimo_acceso ASC')
+        claves = []
+        for clave, tamano in filas:
+            if total <= self.tamano_maximo:
+                break
+            claves.append((clave,))
+            total -= tamano
+        con.executemany('DELETE FROM resultados WHERE clave = ?', claves)
+
+    def obtener_o_calcular(self, tipo_pozo, parametros, funcion):
+        """
+        Devuelve el resultado almacenado para `tipo_pozo` y `parametros`; si no
+        existe, lo calcula con `funcion()` y lo guarda. Los resultados None
+        (cálculos fallidos) no se almacenan.
+        """
+        clave = clave_resultado(tipo_pozo, parametros)
+        try:
+            valor = self.obtener(clave)
+        except sqlite3.Error:
+            # Un almacén inaccesible nunca debe impedir el cálculo
+            return funcion()
+        if valor is not None:
+            return valor
+        valor = funcion()
+        if valor is not None:
+            try:
+                self.guardar(clave, tipo_pozo, valor)
+            except (sqlite3.Error, TypeError):
+                pass
+        return valor
+
+
+_almacen = None
+_candado = threading.Lock()
+
+
+def obtener_almacen():
+    """
+    Devuelve la instancia compartida del almacén de resultados del proceso.
+    """
+    global _almacen
+    with _candado:
+        if _almacen is None:
+            _almacen = AlmacenResultados()
+        return _almacen
+
+
+def obtener_o_calcular(tipo_pozo, parametros, funcion):
+    """
+    Atajo sobre el almacén compartido usado por los módulos de pozo. Si el
+    archivo del almacén no puede abrirse, el resultado se calcula directamente.
+    """
+    try:
+        almacen = obtener_almacen()
+    except sqlite3.Error:
+        return funcion()
+    return almacen.obtener_o_calcular(tipo_pozo, parametros, funcion)
@@ -0,0 +1,483 @@
+#-----------------Archivo Histórico de Pozos -------------------------#
+# Archivo local de trayectorias diseñadas y perforadas. Las estaciones se
+# guardan en segmentos columnares de solo anexado (un archivo binario de
+# float64 por columna, leído con mapeo en memoria) que se renuevan al llegar
+# a un tamaño máximo, y un índice SQLite registra cada pozo
+# (nombre, pad, campo, rangos de MD/TVD) y bloques de estaciones con su caja
+# envolvente Norte / Este / TVD en una tabla R*Tree. Así, consultas como
+# "pozos a menos de 500 ft de este objetivo entre 6000 y 8000 ft de TVD" solo
+# leen los bloques candidatos, y la comparación con pozos vecinos carga
+# únicamente las ventanas de profundidad necesarias.
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Directorio del archivo; en despliegues con varias réplicas debe ser un volumen compartido
+RUTA_ARCHIVO = os.environ.get('WTS_ARCHIVO_RUTA', 'archivo_pozos')
+
+# Columnas de cada segmento, con los nombres usados por trayectoria_3d.perfil_a_dataframe
+COLUMNAS = {
+    'md': 'MD',
+    'inclinacion': 'Inclinación',
+    'azimut': 'Azimut',
+    'norte': 'Norte',
+    'este': 'Este',
+    'tvd': 'TVD',
+}
+
+# Número de estaciones por bloque del índice espacial
+ESTACIONES_POR_BLOQUE = 64
+
+# Estaciones por segmento antes de abrir uno nuevo (8 MB por columna)
+FILAS_POR_SEGMENTO = 1024 * 1024
+
+# Segmentos mapeados en memoria que se mantienen abiertos por proceso
+SEGMENTOS_ABIERTOS = 8
+
+
+class ArchivoPozos:
+    """
+    Archivo histórico de pozos con segmentos columnares de solo anexado y un
+    índice SQLite por pozo, pad, campo y rangos de profundidad.
+
+    Parámetros:
+    ----------
+    ruta : str
+        Directorio del archivo (se crea si no existe).
+    """
+
+    def __init__(self, ruta=RUTA_ARCHIVO):
+        self.ruta = ruta
+        os.makedirs(ruta, exist_ok=True)
+        self._local = threading.local()
+        self._segmentos = OrderedDict()
+        self._candado = threading.Lock()
+
+        con = self._conexion()
+        con.execute('PRAGMA journal_mode=WAL')
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS pozos (
+                pozo_id INTEGER PRIMARY KEY,
+                nombre TEXT NOT NULL,
+                pad TEXT,
+                campo TEXT,
+                tipo TEXT,
+                estado TEXT,
+                segmento TEXT NOT NULL,
+                fila_inicio INTEGER NOT NULL,
+                fila_fin INTEGER NOT NULL,
+                md_min REAL, md_max REAL,
+                tvd_min REAL, tvd_max REAL,
+                fecha REAL NOT NULL
+            )
+        """)
+        con.execute('CREATE INDEX IF NOT EXISTS idx_pozos_campo_pad ON pozos (campo, pad)')
+        con.execute('CREATE INDEX IF NOT EXISTS idx_pozos_nombre ON pozos (nombre)')
+        con.execute('CREATE INDEX IF NOT EXISTS idx_pozos_tvd ON pozos (tvd_min, tvd_max)')
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS bloques (
+                bloque_id INTEGER PRIMARY KEY,
+                pozo_id INTEGER NOT NULL,
+                fila_inicio INTEGER NOT NULL,
+                fila_fin INTEGER NOT NULL,
+                md_min REAL, md_max REAL,
+                tvd_min REAL, tvd_max REAL
+            )
+        """)
+        con.execute('CREATE INDEX IF NOT EXISTS idx_bloques_pozo ON bloques (pozo_id, tvd_min)')
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS segmentos (
+                segmento_id INTEGER PRIMARY KEY,
+                segmento TEXT,
+                filas INTEGER NOT NULL
+            )
+        """)
+        try:
+            con.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS bloques_espacial USING rtree (
+                    id, norte_min, norte_max, este_min, este_max, tvd_min, tvd_max
+                )
+            """)
+        except sqlite3.OperationalError:
+            # SQLite compilado sin R*Tree: misma tabla con un índice convencional por TVD
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS bloques_espacial (
+                    id INTEGER PRIMARY KEY, norte_min REAL, norte_max REAL,
+                    este_min REAL, este_max REAL, tvd_min REAL, tvd_max REAL
+                )
+            """)
+            con.execute('CREATE INDEX IF NOT EXISTS idx_espacial_tvd ON bloques_espacial (tvd_min, tvd_max)')
+
+    def _conexion(self):
+        # Conexión propia de cada hilo, en modo autocommit con transacciones explícitas
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(os.path.join(self.ruta, 'indice.sqlite3'), timeout=30, isolation_level=None)
+            self._local.con = con
+        return con
+
+    def _columnas(self, segmento, filas):
+        # Columnas del segmento mapeadas en memoria. Las filas ya escritas nunca
+        # cambian; si se necesitan filas anexadas después del mapeo, se vuelve a
+        # mapear. Solo quedan abiertos los SEGMENTOS_ABIERTOS usados más recientemente.
+        with self._candado:
+            columnas = self._segmentos.get(segmento)
+            if columnas is None or len(columnas['md']) < filas:
+                columnas = {}
+                for columna in COLUMNAS:
+                    ruta_columna = os.path.join(self.ruta, segmento, f'{columna}.f8')
+                    columnas[columna] = np.memmap(ruta_columna, dtype='<f8', mode='r',
+                                                  shape=(os.path.getsize(ruta_columna) // 8,))
+                self._segmentos[segmento] = columnas
+            self._segmentos.move_to_end(segmento)
+            while len(self._segmentos) > SEGMENTOS_ABIERTOS:
+                self._segmentos.popitem(last=False)
+            return columnas
+
+    def _segmento_activo(self, con, filas_nuevas):
+        # Último segmento con sus filas, o uno nuevo si no admite `filas_nuevas` estaciones más
+        ultimo = con.execute('SELECT segmento, filas FROM segmentos ORDER BY segmento_id DESC LIMIT 1').fetchone()
+        if ultimo is not None and (ultimo[1] == 0 or ultimo[1] + filas_nuevas <= FILAS_POR_SEGMENTO):
+            return ultimo
+        segmento_id = con.execute('INSERT INTO segmentos (filas) VALUES (0)').lastrowid
+        segmento = f'segmento_{segmento_id:06d}'
+        con.execute('UPDATE segmentos SET segmento = ? WHERE segmento_id = ?', (segmento, segmento_id))
+        os.makedirs(os.path.join(self.ruta, segmento), exist_ok=True)
+        return segmento, 0
+
+    def _anexar(self, segmento, fila, valores):
+        # Escribe cada columna a partir de `fila`; lo que haya más allá de las filas
+        # registradas (restos de una escritura interrumpida) se descarta antes
+        for columna, datos in valores.items():
+            ruta_columna = os.path.join(self.ruta, segmento, f'{columna}.f8')
+            with open(ruta_columna, 'r+b' if os.path.exists(ruta_columna) else 'wb') as archivo:
+                archivo.truncate(fila * 8)
+                archivo.seek(fila * 8)
+                archivo.write(np.ascontiguousarray(datos, dtype='<f8').tobytes())
+                archivo.flush()
+                os.fsync(archivo.fileno())
+
+    def archivar(self, pozos):
+        """
+        Anexa uno o varios pozos al final del segmento activo del archivo; al
+        superar FILAS_POR_SEGMENTO estaciones se abre un segmento nuevo.
+
+        Parámetros:
+        ----------
+        pozos : list of dict
+            Cada pozo con las claves "nombre", "pad", "campo", "tipo", "estado"
+            y "survey", un DataFrame con las columnas MD, Inclinación, Azimut,
+            Norte, Este y TVD en coordenadas de campo.
+
+        Retorna:
+        --------
+        list:
+            Identificadores asignados a los pozos archivados.
+        """
+        if not pozos:
+            return []
+
+        valores = {
+            columna: np.concatenate([np.asarray(pozo['survey'][nombre_columna], dtype=np.float64) for pozo in pozos])
+            for columna, nombre_columna in COLUMNAS.items()
+        }
+        total = len(valores['md'])
+
+        # La transacción de escritura serializa los anexos de todos los procesos; las
+        # filas escritas solo pasan a formar parte del segmento al confirmar el índice
+        con = self._conexion()
+        identificadores = []
+        con.execute('BEGIN IMMEDIATE')
+        try:
+            segmento, fila = self._segmento_activo(con, total)
+            self._anexar(segmento, fila, valores)
+            con.execute('UPDATE segmentos SET filas = ? WHERE segmento = ?', (fila + total, segmento))
+            for pozo in pozos:
+                survey = pozo['survey']
+                md = np.asarray(survey['MD'], dtype=np.float64)
+                tvd = np.asarray(survey['TVD'], dtype=np.float64)
+                norte = np.asarray(survey['Norte'], dtype=np.float64)
+                este = np.asarray(survey['Este'], dtype=np.float64)
+                n = len(md)
+                cursor = con.execute(
+                    'INSERT INTO pozos (nombre, pad, campo, tipo, estado, segmento, fila_inicio, fila_fin, '
+                    'md_min, md_max, tvd_min, tvd_max, fecha) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (pozo['nombre'], pozo.get('pad'), pozo.get('campo'), pozo.get('tipo'), pozo.get('estado'),
+                     segmento, fila, fila + n, float(md.min()), float(md.max()),
+                     float(tvd.min()), float(tvd.max()), time.time())
+                )
+                pozo_id = cursor.lastrowid
+
+                # Bloques de estaciones que comparten la estación de frontera con el siguiente
+                for inicio in range(0, max(n - 1, 1), ESTACIONES_POR_BLOQUE):
+                    fin = min(inicio + ESTACIONES_POR_BLOQUE + 1, n)
+                    cursor = con.execute(
+                        'INSERT INTO bloques (pozo_id, fila_inicio, fila_fin, md_min, md_max, tvd_min, tvd_max) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (pozo_id, fila + inicio, fila + fin,
+                         float(md[inicio:fin].min()), float(md[inicio:fin].max()),
+                         float(tvd[inicio:fin].min()), float(tvd[inicio:fin].max()))
+                    )
+                    con.execute(
+                        'INSERT INTO bloques_espacial (id, norte_min, norte_max, este_min, este_max, tvd_min, tvd_max) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (cursor.lastrowid,
+                         float(norte[inicio:fin].min()), float(norte[inicio:fin].max()),
+                         float(este[inicio:fin].min()), float(este[inicio:fin].max()),
+                         float(tvd[inicio:fin].min()), float(tvd[inicio:fin].max()))
+                    )
+                identificadores.append(pozo_id)
+                fila += n
+            con.execute('COMMIT')
+        except Exception:
+            con.execute('ROLLBACK')
+            raise
+        return identificadores
+
+    def archivar_perfil(self, perfil, nombres, pad=None, campo=None, tipo=None, estado='diseñado'):
+        """
+        Anexa todos los pozos de un perfil de `trayectoria_3d.perfil_direccional`
+        (vistas de campo con muchos pozos) en una sola escritura.
+        """
+        pozos = []
+        for indice, nombre in enumerate(nombres):
+            survey = pd.DataFrame({
+                nombre_columna: perfil[columna][indice] for columna, nombre_columna in COLUMNAS.items()
+            })
+            pozos.append({'nombre': nombre, 'pad': pad, 'campo': campo, 'tipo': tipo,
+                          'estado': estado, 'survey': survey})
+        return self.archivar(pozos)
+
+    def buscar(self, nombre=None, pad=None, campo=None, tvd_min=None, tvd_max=None, md_min=None, md_max=None):
+        """
+        Busca pozos en el índice por nombre, pad, campo y solapamiento con una
+        ventana de TVD o MD, sin leer los segmentos.
+
+        Retorna:
+        --------
+        pd.DataFrame:
+            Una fila por pozo con sus metadatos y rangos de profundidad.
+        """
+        condiciones, parametros = [], []
+        for columna, valor in (('nombre', nombre), ('pad', pad), ('campo', campo)):
+            if valor is not None:
+                condiciones.append(f'{columna} = ?')
+                parametros.append(valor)
+        for columna, valor in (('tvd_max', tvd_min), ('md_max', md_min)):
+            if valor is not None:
+                condiciones.append(f'{columna} >= ?')
+                parametros.append(valor)
+        for columna, valor in (('tvd_min', tvd_max), ('md_min', md_max)):
+            if valor is not None:
+                condiciones.append(f'{columna} <= ?')
+                parametros.append(valor)
+        consulta = ('SELECT pozo_id, nombre, pad, campo, tipo, estado, md_min, md_max, tvd_min, tvd_max FROM pozos'
+                    + (' WHERE ' + ' AND '.join(condiciones) if condiciones else '') + ' ORDER BY pozo_id')
+        return pd.read_sql_query(consulta, self._conexion(), params=parametros)
+
+    def cargar_ventana(self, pozo_id, tvd_min=None, tvd_max=None, md_min=None, md_max=None):
+        """
+        Carga las estaciones de un pozo dentro de una ventana de TVD y/o MD,
+        leyendo del segmento solo los bloques que la intersectan.
+
+        Retorna:
+        --------
+        pd.DataFrame:
+            Estaciones con las columnas MD, Inclinación, Azimut, Norte, Este y TVD.
+        """
+        con = self._conexion()
+        segmento = con.execute('SELECT segmento FROM pozos WHERE pozo_id = ?', (pozo_id,)).fetchone()
+        if segmento is None:
+            return pd.DataFrame(columns=list(COLUMNAS.values()))
+        bloques = con.execute(
+            'SELECT fila_inicio, fila_fin FROM bloques WHERE pozo_id = ? '
+            'AND tvd_max >= ? AND tvd_min <= ? AND md_max >= ? AND md_min <= ? ORDER BY fila_inicio',
+            (pozo_id,
+             -np.inf if tvd_min is None else tvd_min, np.inf if tvd_max is None else tvd_max,
+             -np.inf if md_min is None else md_min, np.inf if md_max is None else md_max)
+        ).fetchall()
+
+        # Unimos los bloques contiguos para leer cada tramo del segmento una sola vez
+        tramos = []
+        for inicio, fin in bloques:
+            if tramos and inicio <= tramos[-1][1]:
+                tramos[-1][1] = max(tramos[-1][1], fin)
+            else:
+                tramos.append([inicio, fin])
+
+        columnas = self._columnas(segmento[0], tramos[-1][1] if tramos else 0)
+        datos = {
+            nombre_columna: np.concatenate([columnas[columna][inicio:fin] for inicio, fin in tramos]) if tramos
+            else np.empty(0)
+            for columna, nombre_columna in COLUMNAS.items()
+        }
+        ventana = pd.DataFrame(datos)
+        mascara = np.ones(len(ventana), dtype=bool)
+        if tvd_min is not None:
+            mascara &= ventana['TVD'].to_numpy() >= tvd_min
+        if tvd_max is not None:
+            mascara &= ventana['TVD'].to_numpy() <= tvd_max
+        if md_min is not None:
+            mascara &= ventana['MD'].to_numpy() >= md_min
+        if md_max is not None:
+            mascara &= ventana['MD'].to_numpy() <= md_max
+        return ventana[mascara].reset_index(drop=True)
+
+    def pozos_cerca(self, norte, este, radio, tvd_min=None, tvd_max=None, campo=None):
+        """
+        Busca los pozos con alguna estación a menos de `radio` pies (distancia
+        horizontal) del punto (`norte`, `este`) dentro de la ventana de TVD.
+        El índice espacial descarta los bloques lejanos y solo se leen los
+        bloques candidatos.
+
+        Retorna:
+        --------
+        pd.DataFrame:
+            Una fila por pozo con sus metadatos y la distancia mínima en pies,
+            ordenada de menor a mayor distancia.
+        """
+        tvd_min = -np.inf if tvd_min is None else tvd_min
+        tvd_max = np.inf if tvd_max is None else tvd_max
+        consulta = (
+            'SELECT b.pozo_id, p.segmento, b.fila_inicio, b.fila_fin '
+            'FROM bloques_espacial e JOIN bloques b ON b.bloque_id = e.id JOIN pozos p ON p.pozo_id = b.pozo_id '
+            'WHERE e.norte_max >= ? AND e.norte_min <= ? AND e.este_max >= ? AND e.este_min <= ? '
+            'AND e.tvd_max >= ? AND e.tvd_min <= ?'
+        )
+        parametros = [norte - radio, norte + radio, este - radio, este + radio, tvd_min, tvd_max]
+        if campo is not None:
+            consulta += ' AND p.campo = ?'
+            parametros.append(campo)
+
+        distancias = {}
+        for pozo_id, segmento, inicio, fin in self._conexion().execute(consulta, parametros).fetchall():
+            columnas = self._columnas(segmento, fin)
+            tvd = columnas['tvd'][inicio:fin]
+            distancia = np.hypot(columnas['norte'][inicio:fin] - norte, columnas['este'][inicio:fin] - este)
+            distancia = distancia[(tvd >= tvd_min) & (tvd <= tvd_max)]
+            if distancia.size and distancia.min() <= radio:
+                distancias[pozo_id] = min(distancias.get(pozo_id, np.inf), float(distancia.min()))
+
+        columnas_resultado = ['pozo_id', 'nombre', 'pad', 'campo', 'tipo', 'estado', 'distancia']
+        if not distancias:
+            return pd.DataFrame(columns=columnas_resultado)
+        marcadores = ', '.join('?' * len(distancias))
+        resultado = pd.read_sql_query(
+            f'SELECT pozo_id, nombre, pad, campo, tipo, estado FROM pozos WHERE pozo_id IN ({marcadores})',
+            self._conexion(), params=list(distancias)
+        )
+        resultado['distancia'] = resultado['pozo_id'].map(distancias)
+        return resultado.sort_values('distancia').reset_index(drop=True)[columnas_resultado]
+
+
+_archivo = None
+_candado = threading.Lock()
+
+
+def obtener_archivo():
+    """
+    Devuelve la instancia compartida del archivo histórico de pozos del proceso.
+    """
+    global _archivo
+    with _candado:
+        if _archivo is None:
+            _archivo = ArchivoPozos()
+        return _archivo
+
+
+def interfaz_archivo(survey, tipo_pozo):
+    """
+    Sección de la interfaz para archivar el pozo actual y buscar pozos
+    vecinos en el archivo histórico.
+
+    Parámetros:
+    ----------
+    survey : pd.DataFrame
+        Perfil 3D del pozo actual (columnas MD, Inclinación, Azimut, Norte, Este, TVD).
+    tipo_pozo : str
+        Identificador del módulo que llama ('pozo_vertical', 'pozo_tipo_j', 'pozo_tipo_s').
+
+    Retorna:
+    --------
+    pd.DataFrame:
+        Estaciones de los pozos vecinos en la ventana de TVD, relativas a la
+        cabeza del pozo actual, con las columnas 'pozo_id' y 'Pozo' (nombre)
+        (vacío si no se piden).
+    """
+    with st.expander('Archivo histórico de pozos'):
+        col1, col2 = st.columns(2)
+        with col1:
+            nombre = st.text_input('Nombre del pozo', value='')
+            pad = st.text_input('Pad', value='')
+            campo = st.text_input('Campo', value='')
+        with col2:
+            norte_superficie = st.number_input('Norte de superficie (ft)', value=0.0, step=100.0)
+            este_superficie = st.number_input('Este de superficie (ft)', value=0.0, step=100.0)
+            estado = st.selectbox('Estado', options=['diseñado', 'perforado'])
+
+        try:
+            archivo = obtener_archivo()
+        except (OSError, sqlite3.Error) as e:
+            st.error(f"Archivo histórico no disponible: {e}")
+            return pd.DataFrame()
+
+        if st.button('Archivar pozo'):
+            if not nombre:
+                st.error('Ingrese un nombre para archivar el pozo.')
+            else:
+                survey_campo = survey[list(COLUMNAS.values())].copy()
+                survey_campo['Norte'] += norte_superficie
+                survey_campo['Este'] += este_superficie
+                archivo.archivar([{'nombre': nombre, 'pad': pad or None, 'campo': campo or None,
+                                   'tipo': tipo_pozo, 'estado': estado, 'survey': survey_campo}])
+                st.success(f'Pozo {nombre} archivado.')
+
+        # Comparación con pozos vecinos alrededor del objetivo del pozo actual
+        mostrar = st.checkbox('Mostrar pozos vecinos en el gráfico 3D')
+        radio = st.number_input('Radio de búsqueda alrededor del objetivo (ft)', min_value=0.0, value=500.0, step=100.0)
+        tvd_min = st.number_input('TVD mínima de la ventana (ft)', min_value=0.0, value=0.0, step=500.0)
+        tvd_max = st.number_input('TVD máxima de la ventana (ft)', min_value=0.0,
+                                  value=float(np.ceil(survey['TVD'].max())), step=500.0)
+        if not mostrar:
+            return pd.DataFrame()
+
+        objetivo = survey.iloc[-1]
+        vecinos = archivo.pozos_cerca(
+            objetivo['Norte'] + norte_superficie, objetivo['Este'] + este_superficie,
+            radio, tvd_min, tvd_max, campo=campo or None
+        )
+        st.write(vecinos)
+
+        ventanas = []
+        for vecino in vecinos.itertuples():
+            ventana = archivo.cargar_ventana(vecino.pozo_id, tvd_min=tvd_min, tvd_max=tvd_max)
+            ventana['Norte'] -= norte_superficie
+            ventana['Este'] -= este_superficie
+            ventana['pozo_id'] = vecino.pozo_id
+            ventana['Pozo'] = vecino.nombre
+            ventanas.append(ventana)
+        return pd.concat(ventanas, ignore_index=True) if ventanas else pd.DataFrame()
+
+
+def agregar_vecinos(fig, vecinos, profundidad_negativa=False):
+    """
+    Agrega al gráfico 3D (Este / Norte / TVD) una traza por cada pozo vecino
+    devuelto por `interfaz_archivo`. Las trazas se separan por pozo_id, ya
+    que varios pozos archivados pueden compartir el nombre; con
+    `profundidad_negativa` el eje z se grafica como -TVD (pozo vertical).
+    """
+    if vecinos.empty:
+        return fig
+    signo = -1 if profundidad_negativa else 1
+    for pozo_id, ventana in vecinos.groupby('pozo_id', sort=False):
+        fig.add_scatter3d(
+            x=ventana['Este'], y=ventana['Norte'], z=signo * ventana['TVD'],
+            mode='lines', name=f"Vecino: {ventana['Pozo'].iloc[0]} (#{pozo_id})", line=dict(dash='dash')
+        )
+    return fig
@@ -1,9 +1,13 @@
 # -----------------Módulo de Pozo Tipo J ----------------------------#
 import streamlit as st
-import pandas as pd
 import math
 import plotly.express as px
 
+import almacen_resultados
+import archivo_pozos
+import trayectoria_3d
+import validacion
+
 def calculos_trigonometricos(bur, tvd, kop, desplazamiento_horizontal):
     """
     Realiza los cálculos trigonométricos necesarios para la construcción de un pozo tipo J, 
@@ -156,6 +160,130 @@ def calculos_trayectoria(inclinacion, bur, hipotenusa, radio, kop):
         "md": round(md, 2)
     }
 
+def calcular_pozo_j(bur, tvd, kop, desplazamiento_horizontal,
+                    azimut_superficie=0.0, azimut_objetivo=0.0, tasa_giro=0.0):
+    """
+    Ejecuta los cálculos de resumen del pozo tipo J sin dibujar la interfaz,
+    incluida la tangente 3D resuelta hasta el objetivo, que es la parte costosa.
+    El resultado es pequeño, de modo que puede almacenarse y reutilizarse entre
+    sesiones y procesos; el survey se reconstruye con `survey_pozo_j`.
+
+    Parámetros:
+    ----------
+    bur : float
+        Build-Up Rate (BUR) en grados por cada 100 ft.
+    tvd : float
+        True Vertical Depth (TVD) en pies.
+    kop : float
+        Kick-Off Point (KOP) en pies.
+    desplazamiento_horizontal : float
+        Desplazamiento horizontal del pozo en pies.
+    azimut_superficie : float
+        Azimut en el KOP, en grados desde el norte.
+    azimut_objetivo : float
+        Dirección de la cabeza de pozo al objetivo, en grados desde el norte.
+    tasa_giro : float
+        Tasa de giro durante el incremento, en grados por cada 100 ft (0 = la
+        necesaria para alcanzar el azimut de la tangente).
+
+    Retorna:
+    --------
+    dict:
+        Un diccionario con los resultados de cada etapa (o None si ocurre un error):
+        - "trigonometricos": dict, resultado de `calculos_trigonometricos`.
+        - "eob": dict, resultado de `calculos_eob`.
+        - "trayectoria": dict, cuerda, sección tangencial y MD del perfil 3D
+          resuelto hasta el objetivo, con la inclinación y el azimut de la
+          tangente (redondeados para mostrar).
+        - "tangente": dict, inclinación, azimut, longitud y sentido de giro de
+          la tangente sin redondear, para `survey_pozo_j`.
+    """
+    # Cálculos trigonométricos
+    resultados_trigonométricos = calculos_trigonometricos(bur, tvd, kop, desplazamiento_horizontal)
+    if resultados_trigonométricos is None:
+        return None
+
+    # Cálculos en EOP
+    resultados_eob = calculos_eob(
+        resultados_trigonométricos['inclinacion'], 
+        resultados_trigonométricos['radio'], 
+        kop, tvd, desplazamiento_horizontal
+    )
+
+    # Con giro, la tangente del plano no llega al objetivo: se resuelven su
+    # inclinación, azimut y longitud para que el perfil 3D termine en él
+    solucion = trayectoria_3d.resolver_objetivo(
+        kop, bur, tvd, desplazamiento_horizontal, azimut_objetivo,
+        resultados_trigonométricos['inclinacion'],
+        azimut_superficie=azimut_superficie,
+        tasa_giro=tasa_giro
+    )
+    tangente = {
+        "inclinacion": float(solucion['inclinacion'][0]),
+        "azimut": float(solucion['azimut'][0]),
+        "longitud": float(solucion['longitud_tangente'][0]),
+        "sentido_giro": float(solucion['sentido_giro'][0])
+    }
+
+    # La cuerda, la sección tangencial y la MD se reportan desde el perfil resuelto
+    cuerda = (tangente['inclinacion'] * 100) / bur
+    resultados_trayectoria = {
+        "cuerda": round(cuerda, 2),
+        "target_section": round(tangente['longitud'], 2),
+        "md": round(kop + cuerda + tangente['longitud'], 2),
+        "inclinacion_tangente": round(tangente['inclinacion'], 2),
+        "azimut_tangente": round(tangente['azimut'], 2)
+    }
+
+    return {
+        "trigonometricos": resultados_trigonométricos,
+        "eob": resultados_eob,
+        "trayectoria": resultados_trayectoria,
+        "tangente": tangente
+    }
+
+def survey_pozo_j(bur, tvd, kop, desplazamiento_horizontal, azimut_superficie, azimut_objetivo,
+                  tasa_giro, tangente):
+    """
+    Genera el survey 3D del pozo tipo J a partir de la tangente resuelta por
+    `calcular_pozo_j`. La generación es vectorizada y cuesta menos que leer el
+    survey completo del almacén, por lo que se repite en cada ejecución.
+
+    Parámetros:
+    ----------
+    bur, tvd, kop, desplazamiento_horizontal : float
+        Parámetros del pozo, como en `calcular_pozo_j`.
+    azimut_superficie, azimut_objetivo, tasa_giro : float
+        Azimut en el KOP, dirección al objetivo y tasa de giro.
+    tangente : dict
+        Entrada "tangente" del resultado de `calcular_pozo_j`.
+
+    Retorna:
+    --------
+    tuple:
+        - pd.DataFrame, estaciones del perfil 3D (MD, inclinación, azimut,
+          Norte, Este, TVD) por sección.
+        - float, distancia en pies entre el fondo del pozo y el objetivo.
+    """
+    # Perfil 3D de la trayectoria (Norte / Este / TVD) con azimut y giro
+    perfil = trayectoria_3d.perfil_direccional(
+        kop, bur, tangente['inclinacion'], tangente['longitud'],
+        azimut_superficie=azimut_superficie,
+        azimut_tangente=tangente['azimut'],
+        tasa_giro=tasa_giro,
+        sentido_giro=tangente['sentido_giro']
+    )
+    error = trayectoria_3d.error_objetivo(
+        perfil,
+        desplazamiento_horizontal * math.cos(math.radians(azimut_objetivo)),
+        desplazamiento_horizontal * math.sin(math.radians(azimut_objetivo)),
+        tvd
+    )
+    df_combinacion = trayectoria_3d.perfil_a_dataframe(
+        perfil, {'Incremento': 'Cuerda', 'Tangencial': 'Inclinación'}, incluir_pozo=False
+    )
+    return df_combinacion, float(error[0])
+
 def construccion(image1):
     """
     Simula la construcción de la trayectoria de un pozo tipo J, mostrando resultados,
@@ -180,6 +308,15 @@ def construccion(image1):
     tvd = st.sidebar.number_input('Total Vertical Depth', min_value=0, value=9000)
     kop = st.sidebar.number_input('Kickoff Point (KOP)', min_value=0, max_value=int(tvd), value=2000)
     desplazamiento_horizontal = st.sidebar.number_input('Desplazamiento horizontal', min_value=0, max_value=10000, value=3000, step=100)
+    azimut_superficie = st.sidebar.number_input('Azimut de superficie [°]', min_value=0.0, max_value=360.0, value=0.0, step=5.0)
+    azimut_objetivo = st.sidebar.number_input(
+        'Azimut objetivo [°]', min_value=0.0, max_value=360.0, value=0.0, step=5.0,
+        help='Dirección de la cabeza de pozo al objetivo.'
+    )
+    tasa_giro = st.sidebar.number_input(
+        'Tasa de giro [/100ft]', min_value=0.0, max_value=10.0, value=0.0, step=0.5,
+        help='Con 0 se usa la tasa que alcanza el azimut de la tangente al final de la sección de incremento.'
+    )
 
     st.sidebar.markdown('Ing. Carlos Carrillo Villavicencio MSc.')
     st.sidebar.markdown('Versión App: 3.0')
@@ -190,14 +327,43 @@ def construccion(image1):
         st.write(f'Total Vertical Depth: {tvd}')
         st.write(f'Kickoff Point (KOP): {kop}')
         st.write(f'Desplazamiento horizontal: {desplazamiento_horizontal}')
+        st.write(f'Azimut de superficie: {azimut_superficie}')
+        st.write(f'Azimut objetivo: {azimut_objetivo}')
+        st.write(f'Tasa de giro: {tasa_giro}')
 
     # Mostramos el diagrama de construcción
     with st.expander('Diagrama de construcción'):
         st.image(image1, caption='Diagrama de construcción de pozo tipo J', use_column_width=True)
 
-    # Cálculos trigonométricos
-    resultados_trigonométricos = calculos_trigonometricos(bur, tvd, kop, desplazamiento_horizontal)
-    
+    # Validamos las entradas antes de calcular
+    codigo = int(validacion.clasificar_pozo_j(bur, tvd, kop, desplazamiento_horizontal,
+                                              azimut_superficie, azimut_objetivo, tasa_giro))
+    if codigo != validacion.FACTIBLE:
+        st.error(validacion.MENSAJES[codigo])
+        return
+
+    # Cálculos de resumen del pozo, servidos desde el almacén compartido si ya existen
+    resultados = almacen_resultados.obtener_o_calcular(
+        'pozo_tipo_j',
+        {'bur': bur, 'tvd': tvd, 'kop': kop, 'desplazamiento_horizontal': desplazamiento_horizontal,
+         'azimut_superficie': azimut_superficie, 'azimut_objetivo': azimut_objetivo,
+         'tasa_giro': tasa_giro},
+        lambda: calcular_pozo_j(bur, tvd, kop, desplazamiento_horizontal,
+                                azimut_superficie, azimut_objetivo, tasa_giro)
+    )
+    if resultados is None:
+        return
+
+    resultados_trigonométricos = resultados['trigonometricos']
+    resultados_eob = resultados['eob']
+    resultados_trayectoria = resultados['trayectoria']
+
+    # El survey se reconstruye desde la tangente resuelta
+    df_combinacion, error_objetivo = survey_pozo_j(
+        bur, tvd, kop, desplazamiento_horizontal, azimut_superficie, azimut_objetivo,
+        tasa_giro, resultados['tangente']
+    )
+
     with st.expander('Cálculos trigonométricos'):
         st.write(f"Radio: {resultados_trigonométricos['radio']}")
         st.write(f"Hipotenusa: {resultados_trigonométricos['hipotenusa']}")
@@ -206,69 +372,34 @@ def construccion(image1):
         st.write(f"Ángulo alfa: {resultados_trigonométricos['angulo_alfa']}")
         st.write(f"Inclinación: {resultados_trigonométricos['inclinacion']}")
 
-    # Cálculos en EOP
-    resultados_eob = calculos_eob(
-        resultados_trigonométricos['inclinacion'], 
-        resultados_trigonométricos['radio'], 
-        kop, tvd, desplazamiento_horizontal
-    )
-    
     with st.expander('Cálculos en EOP'):
         st.write(f"Cuerda X: {resultados_eob['x_cuerda']}")
         st.write(f"Cuerda Y: {resultados_eob['y_cuerda']}")
         st.write(f"EOP Desp. X: {resultados_eob['desplazamiento_x_eob']}")
         st.write(f"EOP Desp. Y: {resultados_eob['desplazamiento_y_eob']}")
 
-    # Cálculos de trayectoria
-    resultados_trayectoria = calculos_trayectoria(
-        resultados_trigonométricos['inclinacion'],
-        bur,
-        resultados_trigonométricos['hipotenusa'],
-        resultados_trigonométricos['radio'],
-        kop
-    )
-
     with st.expander('Cálculos de trayectoria'):
         st.write(f"Cuerda: {resultados_trayectoria['cuerda']}")
         st.write(f"Target Section: {resultados_trayectoria['target_section']}")
         st.write(f"MD: {resultados_trayectoria['md']}")
+        st.write(f"Inclinación de la tangente: {resultados_trayectoria['inclinacion_tangente']}")
+        st.write(f"Azimut de la tangente: {resultados_trayectoria['azimut_tangente']}")
+
+    # El fondo del pozo dibujado debe coincidir con el objetivo
+    if error_objetivo > trayectoria_3d.TOLERANCIA_OBJETIVO:
+        st.error(f"El fondo del pozo queda a {error_objetivo:.2f} ft del objetivo.")
 
-    # Gráfico 3D de la trayectoria
-    # Parte vertical
-    i = int(kop)
-    ly = list(reversed(range(-i, 0)))
-    lx = [0] * i
-    lz = [0] * i
-    df_fig1 = pd.DataFrame({'Eje x': lx, 'Eje y': ly, 'Eje z': lz})
-    df_fig1['Sección'] = 'Vertical'
-
-    # Parte cuerda
-    inclinacion = int(resultados_trigonométricos['inclinacion'])
-    j = inclinacion + 180
-    lista_grados = list(range(180, j))
-    lx_grados = [resultados_trigonométricos['radio'] - (-resultados_trigonométricos['radio'] * math.cos(math.radians(n))) for n in lista_grados]
-    ly_grados = [(resultados_trigonométricos['radio'] * math.sin(math.radians(n)) - kop) for n in lista_grados]
-    lz_grados = [0] * inclinacion
-    df_fig2 = pd.DataFrame({'Eje x': lx_grados, 'Eje y': ly_grados, 'Eje z': lz_grados})
-    df_fig2['Sección'] = 'Cuerda'
-
-    # Inclinación
-    x1_m = resultados_eob['x_cuerda']
-    x2_m = desplazamiento_horizontal
-    y1_m = -(tvd - resultados_eob['desplazamiento_y_eob'])
-    y2_m = -tvd
-    df_fig3 = pd.DataFrame({'Eje x': [x1_m, x2_m], 'Eje y': [y1_m, y2_m], 'Eje z': [0, 0]})
-    df_fig3['Sección'] = 'Inclinación'
-
-    # Combinamos todas las partes
-    df_combinacion = pd.concat([df_fig1, df_fig2, df_fig3], axis=0)
+    # Archivo histórico: archivar el pozo actual y buscar pozos vecinos
+    vecinos = archivo_pozos.interfaz_archivo(df_combinacion, 'pozo_tipo_j')
 
     # Colocamos el diagrama y el survey en dos columnas
     col1, col2 = st.columns(2)
 
     # Diagrama en 3D en la primera columna
     with col1:
-        fig = px.line_3d(df_combinacion, x="Eje z", y="Eje x", z="Eje y", color='Sección', title='Diagrama de construcción')
+        fig = px.line_3d(df_combinacion, x="Este", y="Norte", z="TVD", color='Sección', title='Diagrama de construcción')
+        fig.update_layout(scene=dict(zaxis=dict(autorange='reversed')))
+        archivo_pozos.agregar_vecinos(fig, vecinos)
         st.write(fig)
 
     # Survey en la segunda columna
@@ -3,6 +3,146 @@ import numpy as np
 import plotly.express as px
 import pandas as pd
 
+import almacen_resultados
+import archivo_pozos
+import trayectoria_3d
+import validacion
+
+
+# Calcular los valores de resumen del pozo tipo S sin dibujar la interfaz
+def calcular_pozo_s(BUR, DOR, KOP, D3, D4, TVD, x4, azimut_superficie=0.0, azimut_objetivo=0.0, tasa_giro=0.0):
+    """
+    Ejecuta los cálculos de resumen del pozo tipo S: geometría en el plano de
+    diseño y tangente 3D resuelta hasta el objetivo, que es la parte costosa.
+    El resultado es pequeño, de modo que puede almacenarse y reutilizarse entre
+    sesiones y procesos; las trayectorias se reconstruyen con `trayectorias_pozo_s`.
+    """
+    # Paso 1: Cálculo de los radios de curvatura
+    r1 = 180 / (np.pi * BUR / 100)  # Radio de curvatura en la sección de incremento
+    r2 = 180 / (np.pi * DOR / 100)  # Radio de curvatura en la sección de disminución
+
+    # Paso 2: Cálculo del ángulo de inclinación theta (en radianes), cubriendo con
+    # arctan2 los casos r1 + r2 > x4 y r1 + r2 < x4 sin bifurcar
+    theta = validacion.theta_pozo_s(BUR, DOR, KOP, D4, x4)
+
+    # Convertir el ángulo theta a grados para reportar resultados más fácilmente
+    theta_deg = np.degrees(theta)
+
+    # ----- Cálculo de profundidades y desplazamientos -----
+    D1 = 0  # La profundidad inicial es siempre 0 (superficie)
+    D2 = KOP + (r1 * np.sin(theta))  # Profundidad al final de la sección de incremento
+    D5 = TVD  # Profundidad total (TVD)
+
+    # Desplazamientos horizontales
+    x1 = 0  # No hay desplazamiento horizontal en la superficie
+    x2 = r1 * (1 - np.cos(theta))  # Desplazamiento al final de la sección de incremento
+
+    # Desplazamiento horizontal al final de la sección tangencial
+    x3 = x2 + (D3 - D2) * np.tan(theta)
+
+    # ----- Tangente 3D con azimut de superficie, azimut objetivo y giro -----
+    # La disminución debe terminar vertical en D4 a x4 del pozo en la dirección
+    # del objetivo; con giro, la tangente de theta no llega a ese punto, por lo
+    # que su inclinación, azimut y longitud se resuelven en 3D (sin giro
+    # coinciden con theta). La vertical final llega hasta TVD
+    solucion = trayectoria_3d.resolver_objetivo(
+        KOP, BUR, D4, x4, azimut_objetivo, theta_deg,
+        azimut_superficie=azimut_superficie,
+        tasa_giro=tasa_giro,
+        dor=DOR
+    )
+    inclinacion = float(solucion['inclinacion'][0])
+    longitud_tangente = float(solucion['longitud_tangente'][0])
+
+    return {
+        'D1': D1, 'D2': float(D2), 'D5': D5,
+        'x1': x1, 'x2': float(x2), 'x3': float(x3),
+        'r1': float(r1), 'r2': float(r2),
+        'theta_deg': float(theta_deg),
+        'tangente': {
+            'inclinacion': inclinacion,
+            'azimut': float(solucion['azimut'][0]),
+            'longitud': longitud_tangente,
+            'sentido_giro': float(solucion['sentido_giro'][0])
+        },
+        # Profundidad medida total del perfil 3D: KOP, incremento, tangente,
+        # disminución y vertical final
+        'md_total': float(KOP + inclinacion * 100 / BUR + longitud_tangente + inclinacion * 100 / DOR + TVD - D4)
+    }
+
+
+# Generar las trayectorias 2D y 3D del pozo tipo S desde los valores de resumen
+def trayectorias_pozo_s(BUR, DOR, KOP, D3, D4, TVD, x4, azimut_superficie, azimut_objetivo, tasa_giro, resultados):
+    """
+    Genera el DataFrame de la trayectoria en el plano de diseño y el perfil 3D
+    (Norte / Este / TVD) con azimut y giro a partir del resultado de
+    `calcular_pozo_s`. La generación es vectorizada y cuesta menos que leer las
+    trayectorias completas del almacén, por lo que se repite en cada ejecución.
+    Devuelve también la distancia en pies entre el fondo del pozo y el objetivo.
+    """
+    r1, r2 = resultados['r1'], resultados['r2']
+    D2, x2, x3 = resultados['D2'], resultados['x2'], resultados['x3']
+    theta = np.radians(resultados['theta_deg'])
+    tangente = resultados['tangente']
+
+    # ----- Crear DataFrame con todos los puntos para los gráficos -----
+    # Sección de incremento: curva
+    theta_values = np.linspace(0, theta, 100)  # Valores de ángulo en la sección de incremento
+    x_increment = r1 * (1 - np.cos(theta_values))  # Desplazamientos horizontales en incremento
+    y_increment = -KOP - r1 * np.sin(theta_values)  # Profundidades en la sección de incremento
+
+    # Sección tangencial: recta
+    x_tangential = np.linspace(x2, x3, 100)  # Desplazamientos horizontales en la sección tangencial
+    y_tangential = np.linspace(-D2, -D3, 100)  # Profundidades en la sección tangencial
+
+    # Sección de disminución: curva
+    points_drop = 100
+    theta_delta = theta / points_drop  # Incremento angular por cada punto
+    theta_values_decrease = theta - (theta_delta * (np.arange(points_drop) + 1))  # Ángulos decrecientes en disminución
+
+    # Cálculos de desplazamiento horizontal y vertical en la sección de disminución
+    y_checkpoint = -D3
+    x_checkpoint = x3
+    y_decrease = r2 * (np.sin(theta) - np.sin(theta_values_decrease))  # Desplazamiento vertical
+    x_decrease = r2 * (1 - np.cos(theta)) - r2 * (1 - np.cos(theta_values_decrease))  # Desplazamiento horizontal
+
+    # Ajustes de coordenadas
+    x_decrease = x_checkpoint + x_decrease
+    y_decrease = y_checkpoint - y_decrease
+
+    # Sección final (vertical): No hay desplazamiento horizontal
+    x_final = np.full(100, x4)
+    y_final = np.linspace(-D4, -TVD, 100)  # La profundidad llega hasta el TVD
+
+    # Concatenar todos los puntos de las diferentes secciones
+    x_total = np.concatenate([x_increment, x_tangential, x_decrease, x_final])
+    z_total = np.concatenate([y_increment, y_tangential, y_decrease, y_final])
+
+    # Crear columna de colores para identificar secciones en los gráficos
+    colors = np.concatenate([np.full(len(x_increment), 'Incremento'),
+                            np.full(len(x_tangential), 'Tangencial'),
+                            np.full(len(x_decrease), 'Disminución'),
+                            np.full(len(x_final), 'Vertical Final')])
+
+    # Crear DataFrame final con todas las coordenadas calculadas en el plano de diseño
+    data = pd.DataFrame({'x': x_total, 'z': z_total, 'Sección': colors})
+
+    # ----- Perfil 3D con la tangente resuelta; la vertical final llega hasta TVD -----
+    perfil = trayectoria_3d.perfil_direccional(
+        KOP, BUR, tangente['inclinacion'], tangente['longitud'],
+        azimut_superficie=azimut_superficie,
+        azimut_tangente=tangente['azimut'],
+        tasa_giro=tasa_giro,
+        dor=DOR,
+        longitud_final=TVD - D4,
+        sentido_giro=tangente['sentido_giro']
+    )
+    error = trayectoria_3d.error_objetivo(
+        perfil, x4 * np.cos(np.radians(azimut_objetivo)), x4 * np.sin(np.radians(azimut_objetivo)), TVD
+    )
+    perfil_3d = trayectoria_3d.perfil_a_dataframe(perfil, incluir_pozo=False)
+
+    return data, perfil_3d, float(error[0])
 
 
 # Definir función principal para construir el pozo tipo S
@@ -110,103 +250,48 @@ def construccion():
         min_value=1.0, max_value=5000.0, value=2600.0, step=10.0
     )
 
+    # Inputs: Azimut de superficie, azimut objetivo y tasa de giro para el perfil 3D
+    azimut_superficie = st.sidebar.number_input(
+        'Azimut de superficie en grados', 
+        min_value=0.0, max_value=360.0, value=0.0, step=5.0
+    )
+    azimut_objetivo = st.sidebar.number_input(
+        'Azimut objetivo en grados', 
+        min_value=0.0, max_value=360.0, value=0.0, step=5.0,
+        help='Dirección de la cabeza de pozo al objetivo (x4).'
+    )
+    tasa_giro = st.sidebar.number_input(
+        'Tasa de giro en grados por cada 100 ft', 
+        min_value=0.0, max_value=10.0, value=0.0, step=0.5,
+        help='Con 0 se usa la tasa que alcanza el azimut de la tangente al final de la sección de incremento.'
+    )
+
     st.sidebar.markdown('Ing. Carlos Carrillo Villavicencio MSc.')
     st.sidebar.markdown('Version App: 3.0')
 
     # ----- Validaciones -----
-    # Asegurarse de que D3 < D4 < TVD
-    if D3 >= D4:
-        st.error('D3 debe ser menor que D4.')
-    elif D4 >= TVD:
-        st.error('D4 debe ser menor que TVD.')
+    # Clasificar las entradas antes de calcular (D3 < D4 < TVD, dominio de arccos, objetivo alcanzable, etc.)
+    codigo = int(validacion.clasificar_pozo_s(BUR, DOR, KOP, D3, D4, TVD, x4,
+                                              azimut_superficie, azimut_objetivo, tasa_giro))
+    if codigo != validacion.FACTIBLE:
+        st.error(validacion.MENSAJES[codigo])
     else:
-        # Si los inputs son válidos, proceder con los cálculos
-
-        # Constante para convertir grados a radianes (usada en las fórmulas trigonométricas)
-        deg_to_rad = np.pi / 180
-
-        # Paso 1: Cálculo de los radios de curvatura
-        r1 = 180 / (np.pi * BUR / 100)  # Radio de curvatura en la sección de incremento
-        r2 = 180 / (np.pi * DOR / 100)  # Radio de curvatura en la sección de disminución
-
-        # Paso 2: Cálculo del ángulo de inclinación theta (en radianes)
-        if r1 + r2 > x4:
-            # Cálculo si el radio total de curvatura es mayor que el desplazamiento x4
-            term1 = np.arctan((D4 - KOP) / (r1 + r2 - x4))
-            term2 = np.arccos((r1 + r2) / (D4 - KOP) * np.sin(term1))
-            theta = term1 - term2
-        else:
-            # Cálculo alternativo si el radio total de curvatura es menor que x4
-            term1 = np.arctan((D4 - KOP) / (x4 - (r1 + r2)))
-            term2 = np.arccos((r1 + r2) / (D4 - KOP) * np.sin(term1))
-            theta = np.pi - term1 - term2  # El ángulo theta en radianes
-
-        # Convertir el ángulo theta a grados para reportar resultados más fácilmente
-        theta_deg = np.degrees(theta)
-
-        # ----- Cálculo de profundidades y desplazamientos -----
-        D1 = 0  # La profundidad inicial es siempre 0 (superficie)
-        D2 = KOP + (r1 * np.sin(theta))  # Profundidad al final de la sección de incremento
-        D5 = TVD  # Profundidad total (TVD)
-
-        # Longitud de la curva en la sección de incremento
-        L1 = theta * r1
-
-        # Profundidad medida al final de la sección de incremento
-        MD2 = KOP + L1
-
-        # Desplazamientos horizontales
-        x1 = 0  # No hay desplazamiento horizontal en la superficie
-        x2 = r1 * (1 - np.cos(theta))  # Desplazamiento al final de la sección de incremento
-        MD3 = MD2 + (D3 - D2) / np.cos(theta)  # Profundidad medida en D3
-
-        # Desplazamiento horizontal al final de la sección tangencial
-        x3 = x2 + (D3 - D2) * np.tan(theta)
-
-        # ----- Crear DataFrame con todos los puntos para los gráficos -----
-        # Sección de incremento: curva
-        theta_values = np.linspace(0, theta, 100)  # Valores de ángulo en la sección de incremento
-        x_increment = r1 * (1 - np.cos(theta_values))  # Desplazamientos horizontales en incremento
-        y_increment = -KOP - r1 * np.sin(theta_values)  # Profundidades en la sección de incremento
-
-        # Sección tangencial: recta
-        x_tangential = np.linspace(x2, x3, 100)  # Desplazamientos horizontales en la sección tangencial
-        y_tangential = np.linspace(-D2, -D3, 100)  # Profundidades en la sección tangencial
-
-        # Sección de disminución: curva
-        points_drop = 100
-        theta_delta = theta / points_drop  # Incremento angular por cada punto
-        theta_values_decrease = theta - (theta_delta * (np.arange(points_drop) + 1))  # Ángulos decrecientes en disminución
-
-        # Cálculos de desplazamiento horizontal y vertical en la sección de disminución
-        y_checkpoint = -D3
-        x_checkpoint = x3
-        y_decrease = r2 * (np.sin(theta) - np.sin(theta_values_decrease))  # Desplazamiento vertical
-        x_decrease = r2 * (1 - np.cos(theta)) - r2 * (1 - np.cos(theta_values_decrease))  # Desplazamiento horizontal
-
-        # Ajustes de coordenadas
-        x_decrease = x_checkpoint + x_decrease
-        y_decrease = y_checkpoint - y_decrease
-
-        # Sección final (vertical): No hay desplazamiento horizontal
-        x_final = np.full(100, x4)
-        y_final = np.linspace(-D4, -TVD, 100)  # La profundidad llega hasta el TVD
-
-        # Concatenar todos los puntos de las diferentes secciones
-        x_total = np.concatenate([x_increment, x_tangential, x_decrease, x_final])
-        z_total = np.concatenate([y_increment, y_tangential, y_decrease, y_final])
-
-        # Crear columna de colores para identificar secciones en los gráficos
-        colors = np.concatenate([np.full(len(x_increment), 'Incremento'),
-                                np.full(len(x_tangential), 'Tangencial'),
-                                np.full(len(x_decrease), 'Disminución'),
-                                np.full(len(x_final), 'Vertical Final')])
-
-        # Crear columna Y para los gráficos 3D
-        y_total = np.zeros_like(x_total)
-
-        # Crear DataFrame final con todas las coordenadas calculadas
-        data = pd.DataFrame({'x': x_total, 'y': y_total, 'z': z_total, 'Sección': colors})
+        # Si los inputs son válidos, obtener los valores de resumen desde el almacén compartido o calcularlos
+        resultados = almacen_resultados.obtener_o_calcular(
+            'pozo_tipo_s',
+            {'BUR': BUR, 'DOR': DOR, 'KOP': KOP, 'D3': D3, 'D4': D4, 'TVD': TVD, 'x4': x4,
+             'azimut_superficie': azimut_superficie, 'azimut_objetivo': azimut_objetivo, 'tasa_giro': tasa_giro},
+            lambda: calcular_pozo_s(BUR, DOR, KOP, D3, D4, TVD, x4, azimut_superficie, azimut_objetivo, tasa_giro)
+        )
+        D1, D2, D5 = resultados['D1'], resultados['D2'], resultados['D5']
+        x1, x2, x3 = resultados['x1'], resultados['x2'], resultados['x3']
+        r1, r2 = resultados['r1'], resultados['r2']
+        theta_deg = resultados['theta_deg']
+
+        # Las trayectorias se reconstruyen desde la tangente resuelta
+        data, perfil_3d, error_objetivo = trayectorias_pozo_s(
+            BUR, DOR, KOP, D3, D4, TVD, x4, azimut_superficie, azimut_objetivo, tasa_giro, resultados
+        )
 
         # ----- Mostrar los resultados calculados -----
         with st.expander("Resultados calculados"):
@@ -216,6 +301,16 @@ def construccion():
             st.write(f"Radio de Curvatura en Incremento (r1): {r1:.2f} ft")
             st.write(f"Radio de Curvatura en Disminución (r2): {r2:.2f} ft")
             st.write(f"Ángulo de Inclinación (theta): {theta_deg:.2f} grados")
+            st.write(f"Tangente 3D: inclinación = {resultados['tangente']['inclinacion']:.2f} grados, "
+                     f"azimut = {resultados['tangente']['azimut']:.2f} grados")
+            st.write(f"Profundidad medida total (MD): {resultados['md_total']:.2f} ft")
+
+        # El fondo del pozo dibujado debe coincidir con el objetivo
+        if error_objetivo > trayectoria_3d.TOLERANCIA_OBJETIVO:
+            st.error(f"El fondo del pozo queda a {error_objetivo:.2f} ft del objetivo.")
+
+        # ----- Archivo histórico: archivar el pozo actual y buscar pozos vecinos -----
+        vecinos = archivo_pozos.interfaz_archivo(perfil_3d, 'pozo_tipo_s')
 
         # ----- Mostrar los gráficos en dos columnas -----
         col1, col2 = st.columns(2)
@@ -230,8 +325,10 @@ def construccion():
         # Gráfico 3D de la trayectoria
         with col2:
             st.subheader('Trayectoria del Pozo en 3D')
-            fig_3d = px.line_3d(data, x="x", y="y", z="z", color="Sección", title="Trayectoria del Pozo Tipo S en 3D", 
-                                labels={"x": "Desplazamiento Horizontal (ft)", "y": "Eje Y (ft)", "z": "Profundidad Vertical (ft)"})
+            fig_3d = px.line_3d(perfil_3d, x="Este", y="Norte", z="TVD", color="Sección", title="Trayectoria del Pozo Tipo S en 3D", 
+                                labels={"Este": "Este (ft)", "Norte": "Norte (ft)", "TVD": "Profundidad Vertical (ft)"})
+            fig_3d.update_layout(scene=dict(zaxis=dict(autorange='reversed')))
+            archivo_pozos.agregar_vecinos(fig_3d, vecinos)
             st.plotly_chart(fig_3d)
 
 
@@ -4,6 +4,9 @@ import pandas as pd
 import plotly.express as px
 import numpy as np
 
+import almacen_resultados
+import archivo_pozos
+
 # Función principal para la construcción del pozo vertical
 def construccion():
     """
@@ -52,8 +55,14 @@ def construccion():
         st.write("Longitudes ingresadas (en pies):")
         st.write(secciones)
 
-    # Si el usuario ya ingresó todas las longitudes y hace clic en "Construir Survey"
+    # Si el usuario ya ingresó todas las longitudes y hace clic en "Construir Survey".
+    # Las entradas construidas se conservan en la sesión para que los controles
+    # del archivo histórico (que provocan un rerun) no oculten el survey; si las
+    # longitudes o el intervalo cambian, el survey se oculta hasta volver a construirlo.
+    entradas = (tuple(int(longitud) for longitud in secciones['Longitud (ft)']), int(intervalo_survey))
     if st.button('Construir Survey'):
+        st.session_state['survey_vertical_entradas'] = entradas
+    if st.session_state.get('survey_vertical_entradas') == entradas:
         construir_survey(secciones, intervalo_survey, col3, col4)
 
 
@@ -73,6 +82,56 @@ def construir_survey(secciones, intervalo_survey, col3, col4):
     # Informamos al usuario que estamos construyendo el survey
     st.write("Construyendo el Survey del pozo...")
 
+    # Obtenemos los puntos del survey desde el almacén compartido o los calculamos
+    df_puntos_survey = almacen_resultados.obtener_o_calcular(
+        'pozo_vertical',
+        {
+            'longitudes': [int(longitud) for longitud in secciones['Longitud (ft)']],
+            'intervalo_survey': int(intervalo_survey)
+        },
+        lambda: calcular_survey(secciones, intervalo_survey)
+    )
+
+    # Sin longitudes mayores que cero no hay puntos que graficar ni archivar
+    if df_puntos_survey.empty:
+        st.warning('Ingrese al menos una sección con longitud mayor que cero.')
+        return
+
+    # Archivo histórico: el pozo vertical se archiva sin inclinación ni desplazamiento
+    vecinos = archivo_pozos.interfaz_archivo(survey_archivo(df_puntos_survey), 'pozo_vertical')
+
+    # Plotear el survey en 3D con Plotly Express en la tercera columna
+    with col3:
+        fig = px.line_3d(
+            df_puntos_survey, x="Eje x", y="Eje y", z="Eje z", 
+            color='Sección', title='Diagrama de construcción del Pozo Vertical'
+        )
+        archivo_pozos.agregar_vecinos(fig, vecinos, profundidad_negativa=True)
+        st.write(fig)
+
+    # Mostrar el survey completo en una cuarta columna, dentro de un expander
+    with col4:
+        with st.expander('Survey Completo'):
+            st.write(df_puntos_survey)
+
+
+# Función para calcular los puntos del survey sin dibujar la interfaz
+def calcular_survey(secciones, intervalo_survey):
+    """
+    Calcula los puntos intermedios del survey del pozo vertical a partir de las
+    longitudes de cada sección. Separada de la interfaz para que el resultado
+    pueda almacenarse y reutilizarse entre sesiones y procesos.
+
+    Args:
+    secciones (pd.DataFrame): DataFrame con las secciones y longitudes en ft.
+    intervalo_survey (int): Intervalo en pies para la toma de puntos del survey.
+
+    Returns:
+    pd.DataFrame: Puntos del survey con las columnas Sección, Eje x, Eje y y Eje z.
+    """
+    # Trabajamos sobre una copia para no modificar la tabla mostrada al usuario
+    secciones = secciones.copy()
+
     # Asignamos los ejes ficticios para un pozo vertical
     secciones['Eje x'] = 0  # No hay desplazamiento en el eje x
     secciones['Eje y'] = 0  # No hay desplazamiento en el eje y
@@ -97,16 +156,30 @@ def construir_survey(secciones, intervalo_survey, col3, col4):
 
     # Convertimos los puntos intermedios en un dataframe para graficar
     df_puntos_survey = pd.DataFrame(puntos_survey)
-    
-    # Plotear el survey en 3D con Plotly Express en la tercera columna
-    with col3:
-        fig = px.line_3d(
-            df_puntos_survey, x="Eje x", y="Eje y", z="Eje z", 
-            color='Sección', title='Diagrama de construcción del Pozo Vertical'
-        )
-        st.write(fig)
 
-    # Mostrar el survey completo en una cuarta columna, dentro de un expander
-    with col4:
-        with st.expander('Survey Completo'):
-            st.write(df_puntos_survey)
+    return df_puntos_survey
+
+
+# Función para convertir el survey al formato del archivo histórico de pozos
+def survey_archivo(df_puntos_survey):
+    """
+    Convierte los puntos del survey vertical en estaciones con las columnas
+    del archivo histórico: MD y TVD iguales a la profundidad, inclinación y
+    azimut nulos y sin desplazamiento horizontal.
+
+    Args:
+    df_puntos_survey (pd.DataFrame): Puntos del survey con la columna Eje z (profundidad negativa).
+
+    Returns:
+    pd.DataFrame: Estaciones con las columnas MD, Inclinación, Azimut, Norte, Este, TVD y Sección.
+    """
+    profundidad = -df_puntos_survey['Eje z'].to_numpy(dtype=float)
+    return pd.DataFrame({
+        'MD': profundidad,
+        'Inclinación': 0.0,
+        'Azimut': 0.0,
+        'Norte': 0.0,
+        'Este': 0.0,
+        'TVD': profundidad,
+        'Sección': df_puntos_survey['Sección'].to_numpy()
+    })
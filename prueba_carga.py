@@ -0,0 +1,279 @@
+#--------------------------------------------------------------------#
+#-----------Prueba de carga de sesiones concurrentes-----------------#
+#--------------------------------------------------------------------#
+# Arnés sin interfaz que simula N sesiones simultáneas de app.py usando
+# las facilidades de prueba de Streamlit (streamlit.testing.v1.AppTest).
+# Cada sesión recorre la portada y las páginas de pozo vertical, J y S
+# cambiando parámetros al azar, y al final se reportan los percentiles de
+# latencia por rerun, el crecimiento de memoria por sesión y la saturación
+# de CPU del proceso, como fracción de un núcleo: las sesiones corren en
+# hilos del mismo proceso y el GIL las limita a un núcleo en conjunto.
+#
+# Uso:
+#   python prueba_carga.py --sesiones 8 --iteraciones 20
+#   python prueba_carga.py --sesiones 8 --json resultados_carga.json --max-p95 2.0
+
+import argparse
+import gc
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Directorio del repositorio: app.py abre sus imágenes con rutas relativas
+DIRECTORIO_APP = os.path.dirname(os.path.abspath(__file__))
+
+# Páginas disponibles en el selectbox del sidebar
+PAGINAS = ['Seleccione', 'Pozo Vertical', 'Pozo tipo J', 'Pozo tipo S']
+
+
+def memoria_residente():
+    """
+    Devuelve la memoria residente actual del proceso en bytes. En sistemas
+    sin /proc se usa el pico de memoria reportado por getrusage.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource  # No disponible en Windows
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss está en bytes en macOS y en kilobytes en Linux
+        return pico if sys.platform == 'darwin' else pico * 1024
+
+
+def tiempo_cpu():
+    """
+    Devuelve el tiempo de CPU (usuario + sistema) consumido por el proceso.
+    """
+    tiempos = os.times()
+    return tiempos.user + tiempos.system
+
+
+def parametros_pozo_j(rng, at):
+    # Parámetros dentro de los límites de los widgets del pozo tipo J
+    tvd = rng.randrange(4000, 15000, 100)
+    at.sidebar.number_input[0].set_value(float(rng.randint(1, 10)))
+    at.sidebar.number_input[1].set_value(tvd)
+    at.sidebar.number_input[2].set_value(rng.randrange(500, tvd // 2, 100))
+    at.sidebar.number_input[3].set_value(rng.randrange(500, 10000, 100))
+
+
+def parametros_pozo_s(rng, at):
+    # Parámetros dentro de los límites de los widgets del pozo tipo S, con KOP < D3 < D4 < TVD
+    kop = rng.randrange(1000, 4000, 100)
+    d3 = rng.randrange(kop + 2000, kop + 6000, 100)
+    d4 = rng.randrange(d3 + 500, d3 + 3000, 100)
+    tvd = rng.randrange(d4 + 500, d4 + 3000, 100)
+    at.sidebar.number_input[0].set_value(round(rng.uniform(1.0, 6.0), 1))
+    at.sidebar.number_input[1].set_value(round(rng.uniform(1.0, 6.0), 1))
+    at.sidebar.number_input[2].set_value(kop)
+    at.sidebar.number_input[3].set_value(d3)
+    at.sidebar.number_input[4].set_value(d4)
+    at.sidebar.number_input[5].set_value(tvd)
+    at.sidebar.number_input[6].set_value(float(rng.randrange(500, 5000, 10)))
+
+
+def parametros_pozo_vertical(rng, at):
+    # Número de secciones, intervalo de survey y longitudes de cada sección
+    at.sidebar.number_input[0].set_value(rng.randint(1, 4))
+    at.sidebar.number_input[1].set_value(rng.choice([10, 50, 100]))
+    at.run()
+    for entrada in at.main.number_input:
+        # Solo las longitudes de sección; los demás controles son del archivo histórico
+        if entrada.label.startswith('Longitud'):
+            entrada.set_value(rng.randrange(500, 5000, 100))
+    at.main.button[0].click()
+
+
+PARAMETROS_POR_PAGINA = {
+    'Pozo Vertical': parametros_pozo_vertical,
+    'Pozo tipo J': parametros_pozo_j,
+    'Pozo tipo S': parametros_pozo_s,
+}
+
+
+def simular_sesion(indice, iteraciones, semilla, tiempo_espera):
+    """
+    Simula una sesión de usuario: carga la portada y luego recorre páginas al
+    azar cambiando parámetros, midiendo la latencia de cada rerun.
+
+    Retorna:
+    --------
+    dict:
+        - "latencias": lista de (página, segundos) por rerun.
+        - "errores": número de reruns que terminaron con una excepción.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(semilla + indice)
+    at = AppTest.from_file(os.path.join(DIRECTORIO_APP, 'app.py'), default_timeout=tiempo_espera)
+    latencias = []
+    errores = 0
+
+    inicio = time.perf_counter()
+    at.run()
+    latencias.append(('Seleccione', time.perf_counter() - inicio))
+
+    for _ in range(iteraciones):
+        pagina = rng.choice(PAGINAS)
+        if at.sidebar.selectbox[0].value != pagina:
+            at.sidebar.selectbox[0].set_value(pagina)
+            at.run()
+        if pagina in PARAMETROS_POR_PAGINA:
+            PARAMETROS_POR_PAGINA[pagina](rng, at)
+
+        inicio = time.perf_counter()
+        at.run()
+        latencias.append((pagina, time.perf_counter() - inicio))
+        if len(at.exception):
+            errores += 1
+
+    return {'latencias': latencias, 'errores': errores}
+
+
+def calentar(tiempo_espera):
+    """
+    Recorre una vez todas las páginas en una sesión descartada, de modo que
+    las importaciones y los objetos creados una sola vez por proceso (Streamlit,
+    Plotly, pandas) no se cuenten como memoria por sesión.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(-1)
+    at = AppTest.from_file(os.path.join(DIRECTORIO_APP, 'app.py'), default_timeout=tiempo_espera)
+    at.run()
+    for pagina in PAGINAS[1:]:
+        at.sidebar.selectbox[0].set_value(pagina)
+        at.run()
+        PARAMETROS_POR_PAGINA[pagina](rng, at)
+        at.run()
+
+
+def percentiles(valores, cuantiles=(50, 90, 95, 99)):
+    """
+    Calcula percentiles por el método del rango más cercano, en milisegundos.
+    """
+    ordenados = sorted(valores)
+    if not ordenados:
+        return {f'p{q}': None for q in cuantiles}
+    resultado = {}
+    for q in cuantiles:
+        posicion = max(0, min(len(ordenados) - 1, math.ceil(q / 100 * len(ordenados)) - 1))
+        resultado[f'p{q}'] = round(ordenados[posicion] * 1000, 2)
+    return resultado
+
+
+def ejecutar_prueba(sesiones, iteraciones, semilla=0, tiempo_espera=60):
+    """
+    Ejecuta `sesiones` sesiones simultáneas y devuelve el reporte de la prueba.
+    """
+    # Muestreamos la memoria residente durante la prueba para detectar picos
+    muestras_memoria = []
+    detener = threading.Event()
+
+    def muestrear():
+        while not detener.is_set():
+            muestras_memoria.append(memoria_residente())
+            detener.wait(0.1)
+
+    # La línea base se toma después de una sesión de calentamiento, para que el
+    # crecimiento de memoria medido sea el de las sesiones y no el de las importaciones
+    calentar(tiempo_espera)
+    gc.collect()
+    memoria_inicial = memoria_residente()
+    cpu_inicial = tiempo_cpu()
+    inicio = time.perf_counter()
+
+    muestreador = threading.Thread(target=muestrear, daemon=True)
+    muestreador.start()
+    with ThreadPoolExecutor(max_workers=sesiones) as ejecutor:
+        resultados = list(ejecutor.map(
+            lambda i: simular_sesion(i, iteraciones, semilla, tiempo_espera), range(sesiones)
+        ))
+    detener.set()
+    muestreador.join()
+
+    duracion = time.perf_counter() - inicio
+    cpu_usado = tiempo_cpu() - cpu_inicial
+    gc.collect()
+    memoria_pico = max(muestras_memoria + [memoria_residente()])
+
+    por_pagina = {}
+    for resultado in resultados:
+        for pagina, segundos in resultado['latencias']:
+            por_pagina.setdefault(pagina, []).append(segundos)
+    todas = [s for valores in por_pagina.values() for s in valores]
+
+    return {
+        'sesiones': sesiones,
+        'iteraciones': iteraciones,
+        'reruns': len(todas),
+        'errores': sum(r['errores'] for r in resultados),
+        'duracion_s': round(duracion, 2),
+        'reruns_por_segundo': round(len(todas) / duracion, 2),
+        'latencia_ms': percentiles(todas),
+        'latencia_ms_por_pagina': {pagina: percentiles(valores) for pagina, valores in por_pagina.items()},
+        'memoria_inicial_mb': round(memoria_inicial / 2**20, 1),
+        'memoria_pico_mb': round(memoria_pico / 2**20, 1),
+        # Memoria que ocupa cada sesión abierta: el pico (todas las sesiones
+        # vivas a la vez) sobre la línea base, repartido entre las sesiones
+        'memoria_por_sesion_mb': round((memoria_pico - memoria_inicial) / sesiones / 2**20, 2),
+        # Fracción de un núcleo usada por el proceso (1.0 = un núcleo al 100%).
+        # Con el GIL, las sesiones en hilos no pasan de un núcleo aunque la
+        # máquina tenga más, por lo que no se divide entre os.cpu_count()
+        'saturacion_nucleo': round(cpu_usado / duracion, 3),
+    }
+
+
+def imprimir_reporte(reporte):
+    print(f"Sesiones: {reporte['sesiones']}  Reruns: {reporte['reruns']}  Errores: {reporte['errores']}")
+    print(f"Duración: {reporte['duracion_s']} s  ({reporte['reruns_por_segundo']} reruns/s)")
+    print(f"Latencia global (ms): {reporte['latencia_ms']}")
+    for pagina, valores in reporte['latencia_ms_por_pagina'].items():
+        print(f"  {pagina:<15} {valores}")
+    print(f"Memoria: inicial {reporte['memoria_inicial_mb']} MB, pico {reporte['memoria_pico_mb']} MB, "
+          f"por sesión (pico - inicial) {reporte['memoria_por_sesion_mb']} MB")
+    print(f"CPU: saturación de un núcleo {reporte['saturacion_nucleo'] * 100:.1f}% (las sesiones comparten el GIL)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga de sesiones concurrentes para app.py')
+    parser.add_argument('--sesiones', type=int, default=4, help='Número de sesiones simultáneas')
+    parser.add_argument('--iteraciones', type=int, default=10, help='Cambios de parámetros por sesión')
+    parser.add_argument('--semilla', type=int, default=0, help='Semilla de los parámetros aleatorios')
+    parser.add_argument('--tiempo-espera', type=float, default=60, help='Tiempo máximo por rerun (s)')
+    parser.add_argument('--almacen', default=None,
+                        help='Archivo del almacén de resultados (por defecto uno temporal y vacío)')
+    parser.add_argument('--json', default=None, help='Guardar el reporte en este archivo JSON')
+    parser.add_argument('--max-p95', type=float, default=None,
+                        help='Falla (código 1) si la latencia p95 global supera estos segundos')
+    args = parser.parse_args()
+
+    # Un almacén vacío por defecto, para medir cálculos y no aciertos de una corrida anterior
+    directorio_temporal = tempfile.TemporaryDirectory()
+    os.environ['WTS_ALMACEN_RUTA'] = args.almacen or os.path.join(directorio_temporal.name, 'almacen.sqlite3')
+    os.environ['WTS_ARCHIVO_RUTA'] = os.path.join(directorio_temporal.name, 'archivo_pozos')
+    os.chdir(DIRECTORIO_APP)
+
+    reporte = ejecutar_prueba(args.sesiones, args.iteraciones, args.semilla, args.tiempo_espera)
+    imprimir_reporte(reporte)
+
+    if args.json:
+        with open(args.json, 'w') as archivo:
+            json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+
+    if args.max_p95 is not None and reporte['latencia_ms']['p95'] > args.max_p95 * 1000:
+        print(f"Latencia p95 superior al umbral de {args.max_p95} s")
+        sys.exit(1)
+    if reporte['errores']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,381 @@
+#-----------------Trayectorias Direccionales en 3D -------------------#
+# Generación vectorizada de perfiles direccionales en coordenadas
+# Norte / Este / TVD. Cada perfil se describe por secciones (vertical,
+# incremento con giro, tangencial y, para pozos tipo S, disminución y
+# vertical final); la inclinación y el azimut se evalúan en todas las
+# estaciones a la vez y las coordenadas se integran con el método de
+# mínima curvatura. Todos los parámetros aceptan escalares o arreglos, de
+# modo que cientos de pozos se generan en una sola llamada sin
+# trigonometría punto a punto en Python.
+import numpy as np
+import pandas as pd
+
+# Nombres de las secciones de un perfil, en orden
+SECCIONES = ['Vertical', 'Incremento', 'Tangencial', 'Disminución', 'Vertical Final']
+
+# Distancia máxima (en pies) aceptada entre el fondo del pozo dibujado y el objetivo
+TOLERANCIA_OBJETIVO = 1.0
+
+
+def minima_curvatura(md, inclinacion, azimut):
+    """
+    Integra las coordenadas de un conjunto de estaciones de survey con el
+    método de mínima curvatura.
+
+    Parámetros:
+    ----------
+    md : np.ndarray
+        Profundidad medida de cada estación en pies, forma (n_pozos, n_estaciones).
+    inclinacion : np.ndarray
+        Inclinación de cada estación en grados, misma forma que `md`.
+    azimut : np.ndarray
+        Azimut de cada estación en grados, misma forma que `md`.
+
+    Retorna:
+    --------
+    tuple:
+        Arreglos (norte, este, tvd) en pies relativos a la primera estación,
+        con la misma forma que `md`.
+    """
+    inc = np.radians(inclinacion)
+    azi = np.radians(azimut)
+    i1, i2 = inc[..., :-1], inc[..., 1:]
+    a1, a2 = azi[..., :-1], azi[..., 1:]
+
+    # Dogleg entre estaciones consecutivas y factor de razón (1 en tramos rectos)
+    cos_dogleg = np.cos(i2 - i1) - np.sin(i1) * np.sin(i2) * (1 - np.cos(a2 - a1))
+    dogleg = np.arccos(np.clip(cos_dogleg, -1.0, 1.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = np.where(dogleg > 1e-9, 2 / dogleg * np.tan(dogleg / 2), 1.0)
+
+    medio_tramo = np.diff(md, axis=-1) / 2 * factor
+    d_norte = medio_tramo * (np.sin(i1) * np.cos(a1) + np.sin(i2) * np.cos(a2))
+    d_este = medio_tramo * (np.sin(i1) * np.sin(a1) + np.sin(i2) * np.sin(a2))
+    d_tvd = medio_tramo * (np.cos(i1) + np.cos(i2))
+
+    inicio = np.zeros(md.shape[:-1] + (1,))
+    norte = np.concatenate([inicio, np.cumsum(d_norte, axis=-1)], axis=-1)
+    este = np.concatenate([inicio, np.cumsum(d_este, axis=-1)], axis=-1)
+    tvd = np.concatenate([inicio, np.cumsum(d_tvd, axis=-1)], axis=-1)
+    return norte, este, tvd
+
+
+def _delta_azimut(azimut_superficie, azimut_tangente, sentido_giro):
+    # Giro con signo de `azimut_superficie` a `azimut_tangente`: por el lado más
+    # corto (sentido 0) o en sentido horario (+1) o antihorario (-1)
+    corto = (azimut_tangente - azimut_superficie + 180) % 360 - 180
+    return np.where(sentido_giro > 0, (azimut_tangente - azimut_superficie) % 360,
+                    np.where(sentido_giro < 0, -((azimut_superficie - azimut_tangente) % 360), corto))
+
+
+def _giro(md_incremento, longitud_incremento, azimut_superficie, delta_azimut, tasa_giro):
+    # Azimut en cada estación según la profundidad medida desde el KOP (recortada a
+    # la sección de incremento): gira `delta_azimut` grados a la tasa dada o, con
+    # tasa 0, a la que completa el giro justo al final del incremento
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tasa_necesaria = np.where(longitud_incremento > 0, np.abs(delta_azimut) * 100 / longitud_incremento, 0.0)
+    tasa = np.where(tasa_giro > 0, tasa_giro, tasa_necesaria)
+    giro_insuficiente = (tasa * longitud_incremento / 100 < np.abs(delta_azimut) - 1e-9) & (longitud_incremento > 0)
+    giro = tasa * np.clip(md_incremento, 0, longitud_incremento) / 100
+    azimut = (azimut_superficie + np.sign(delta_azimut) * np.minimum(giro, np.abs(delta_azimut))) % 360
+    return azimut, giro_insuficiente
+
+
+def perfil_direccional(kop, bur, inclinacion, longitud_tangente,
+                       azimut_superficie=0.0, azimut_tangente=0.0, tasa_giro=0.0,
+                       dor=None, longitud_final=0.0, sentido_giro=0,
+                       norte_superficie=0.0, este_superficie=0.0,
+                       puntos_por_seccion=100):
+    """
+    Genera perfiles direccionales 3D para uno o varios pozos a la vez.
+
+    El pozo es vertical hasta el KOP; en la sección de incremento la
+    inclinación crece a razón de `bur` y, simultáneamente, el azimut gira desde
+    `azimut_superficie` hacia `azimut_tangente` (por el lado más corto, salvo
+    que `sentido_giro` indique otro). Con
+    `tasa_giro` igual a 0 se usa la tasa que alcanza `azimut_tangente` justo
+    al final del incremento; con una tasa dada, el giro se detiene al
+    alcanzarlo. El azimut alcanzado se mantiene en el resto del pozo. Luego
+    sigue una sección tangencial y, si se indica `dor`, una sección de
+    disminución hasta la vertical y una sección vertical final (pozo tipo S).
+
+    Parámetros:
+    ----------
+    kop : float o np.ndarray
+        Kick-Off Point (KOP) en pies.
+    bur : float o np.ndarray
+        Build-Up Rate (BUR) en grados por cada 100 ft.
+    inclinacion : float o np.ndarray
+        Inclinación de la sección tangencial en grados.
+    longitud_tangente : float o np.ndarray
+        Longitud medida de la sección tangencial en pies.
+    azimut_superficie : float o np.ndarray
+        Azimut inicial en el KOP, en grados desde el norte.
+    azimut_tangente : float o np.ndarray
+        Azimut de la sección tangencial (al final del giro), en grados desde
+        el norte. Para que el pozo llegue a un objetivo dado se obtiene con
+        `resolver_objetivo`.
+    tasa_giro : float o np.ndarray
+        Tasa de giro en grados por cada 100 ft (0 calcula la tasa necesaria
+        para alcanzar `azimut_tangente` durante el incremento).
+    dor : float o np.ndarray, opcional
+        Drop-Off Rate (DOR) en grados por cada 100 ft; si es None el perfil
+        termina en la sección tangencial (pozo tipo J).
+    longitud_final : float o np.ndarray
+        Longitud de la sección vertical final en pies (solo con `dor`).
+    sentido_giro : int o np.ndarray
+        0 gira por el lado más corto; +1 en sentido horario y -1 antihorario
+        (giros de más de 180°, como los que devuelve `resolver_objetivo`).
+    norte_superficie, este_superficie : float o np.ndarray
+        Coordenadas de la cabeza de pozo, para vistas de campo con varios pozos.
+    puntos_por_seccion : int
+        Número de estaciones por sección.
+
+    Retorna:
+    --------
+    dict:
+        Arreglos de forma (n_pozos, n_estaciones):
+        - "md", "inclinacion", "azimut", "norte", "este", "tvd".
+        Y de forma (n_pozos,):
+        - "giro_insuficiente": True donde la `tasa_giro` dada no alcanza
+          `azimut_tangente` antes de terminar el incremento.
+        Y de forma (n_estaciones,):
+        - "seccion": nombre de la sección de cada estación.
+    """
+    # Sin DOR el perfil es tipo J; se usa NaN solo para difundir las formas juntas
+    tipo_s = dor is not None
+    kop, bur, inclinacion, longitud_tangente, azimut_superficie, azimut_tangente, tasa_giro, \
+        norte_superficie, este_superficie, dor, longitud_final, sentido_giro = [
+            np.atleast_1d(np.asarray(valor, dtype=float))[:, None] for valor in np.broadcast_arrays(
+                kop, bur, inclinacion, longitud_tangente, azimut_superficie, azimut_tangente,
+                tasa_giro, norte_superficie, este_superficie, dor if tipo_s else np.nan, longitud_final,
+                sentido_giro
+            )
+        ]
+
+    # Longitudes medidas de cada sección
+    longitudes = [kop, inclinacion * 100 / bur, longitud_tangente]
+    if tipo_s:
+        longitudes += [inclinacion * 100 / dor, longitud_final]
+
+    # Estaciones de cada sección como fracción de su longitud
+    fraccion = np.linspace(0.0, 1.0, puntos_por_seccion)[None, :]
+    md_secciones, inc_secciones = [], []
+    inicio = np.zeros_like(kop)
+    for indice, longitud in enumerate(longitudes):
+        md_seccion = inicio + fraccion * longitud
+        if indice == 1:
+            inc_seccion = fraccion * inclinacion  # Incremento a razón de BUR
+        elif indice == 2:
+            inc_seccion = np.broadcast_to(inclinacion, md_seccion.shape)
+        elif indice == 3:
+            inc_seccion = (1 - fraccion) * inclinacion  # Disminución a razón de DOR
+        else:
+            inc_seccion = np.zeros_like(md_seccion)
+        md_secciones.append(md_seccion)
+        inc_secciones.append(inc_seccion)
+        inicio = inicio + longitud
+
+    md = np.concatenate(md_secciones, axis=1)
+    inc = np.concatenate(inc_secciones, axis=1)
+
+    # Giro durante el incremento; el azimut alcanzado se mantiene hasta el fondo
+    delta_azimut = _delta_azimut(azimut_superficie, azimut_tangente, sentido_giro)
+    azi, giro_insuficiente = _giro(md - kop, longitudes[1], azimut_superficie, delta_azimut, tasa_giro)
+
+    norte, este, tvd = minima_curvatura(md, inc, azi)
+    seccion = np.repeat(SECCIONES[:len(longitudes)], puntos_por_seccion)
+
+    return {
+        'md': md,
+        'inclinacion': inc,
+        'azimut': azi,
+        'norte': norte + norte_superficie,
+        'este': este + este_superficie,
+        'tvd': tvd,
+        'giro_insuficiente': giro_insuficiente[:, 0],
+        'seccion': seccion
+    }
+
+
+def _fin_incremento(bur, inclinacion, azimut_superficie, delta_azimut, tasa_giro, puntos_por_seccion):
+    # Coordenadas del final del incremento relativas al KOP, integradas sobre las
+    # mismas estaciones que usa perfil_direccional (arreglos de forma (n,))
+    longitud = inclinacion * 100 / bur
+    fraccion = np.linspace(0.0, 1.0, puntos_por_seccion)[None, :]
+    md = fraccion * longitud[:, None]
+    azimut, _ = _giro(md, longitud[:, None], azimut_superficie[:, None], delta_azimut[:, None],
+                      tasa_giro[:, None])
+    norte, este, tvd = minima_curvatura(md, fraccion * inclinacion[:, None], azimut)
+    return norte[:, -1], este[:, -1], tvd[:, -1]
+
+
+def resolver_objetivo(kop, bur, tvd_objetivo, desplazamiento, azimut_objetivo, inclinacion_plano,
+                      azimut_superficie=0.0, tasa_giro=0.0, dor=None,
+                      puntos_por_seccion=100, iteraciones=30, tolerancia=1e-8):
+    """
+    Resuelve la inclinación, el azimut y la longitud de la sección tangencial
+    para que el perfil 3D con giro termine en el objetivo.
+
+    El objetivo está a `desplazamiento` pies de la cabeza de pozo en la
+    dirección `azimut_objetivo`, a la profundidad `tvd_objetivo`. En un pozo
+    tipo J la tangente termina en el objetivo; en un pozo tipo S (con `dor`)
+    la disminución posterior termina vertical en él. Como el giro durante el
+    incremento desplaza lateralmente el final de la curva, la inclinación y el
+    azimut de la tangente no coinciden con los de la solución en el plano; se
+    ajustan con Newton (jacobiano por diferencias) partiendo de
+    `inclinacion_plano` y `azimut_objetivo`, con el final del incremento
+    integrado sobre las mismas estaciones que `perfil_direccional`. Sin giro,
+    la solución es la del plano.
+
+    Parámetros:
+    ----------
+    kop, bur : float o np.ndarray
+        Kick-Off Point en pies y Build-Up Rate en grados por cada 100 ft.
+    tvd_objetivo : float o np.ndarray
+        Profundidad vertical del objetivo (en el pozo tipo S, D4) en pies.
+    desplazamiento : float o np.ndarray
+        Desplazamiento horizontal al objetivo en pies.
+    azimut_objetivo : float o np.ndarray
+        Dirección de la cabeza de pozo al objetivo, en grados desde el norte.
+    inclinacion_plano : float o np.ndarray
+        Inclinación de la solución en el plano (sin giro), en grados.
+    azimut_superficie : float o np.ndarray
+        Azimut en el KOP, en grados desde el norte.
+    tasa_giro : float o np.ndarray
+        Tasa de giro en grados por cada 100 ft (0 = automática).
+    dor : float o np.ndarray, opcional
+        Drop-Off Rate (DOR) en grados por cada 100 ft (pozo tipo S).
+
+    Retorna:
+    --------
+    dict:
+        Arreglos de forma (n_pozos,):
+        - "inclinacion", "azimut": inclinación y azimut de la tangente (grados).
+        - "sentido_giro": sentido del giro (+1 horario, -1 antihorario, 0 sin
+          giro), para `perfil_direccional`.
+        - "longitud_tangente": longitud medida de la tangente (pies).
+        - "convergido": False donde no existe una tangente que llegue al objetivo.
+        - "giro_insuficiente": True donde la `tasa_giro` dada no alcanza el
+          azimut de la tangente antes de terminar el incremento.
+    """
+    tipo_s = dor is not None
+    kop, bur, tvd_objetivo, desplazamiento, azimut_objetivo, inclinacion_plano, azimut_superficie, \
+        tasa_giro, dor = [
+            np.atleast_1d(np.asarray(valor, dtype=float)).copy() for valor in np.broadcast_arrays(
+                kop, bur, tvd_objetivo, desplazamiento, azimut_objetivo, inclinacion_plano,
+                azimut_superficie, tasa_giro, dor if tipo_s else np.nan
+            )
+        ]
+    radio_disminucion = 18000 / (np.pi * dor) if tipo_s else np.zeros_like(kop)
+    norte_objetivo = desplazamiento * np.cos(np.radians(azimut_objetivo))
+    este_objetivo = desplazamiento * np.sin(np.radians(azimut_objetivo))
+
+    def residuos(inc, giro, indices):
+        # Diferencia entre la dirección (inclinación, azimut) de la tangente y la
+        # dirección del final del incremento al inicio de la disminución (o al
+        # objetivo), evaluada para los pozos `indices` (puede repetir pozos)
+        azi = azimut_superficie[indices] + giro
+        norte, este, tvd = _fin_incremento(bur[indices], inc, azimut_superficie[indices], giro,
+                                           tasa_giro[indices], puntos_por_seccion)
+        radio = radio_disminucion[indices]
+        caida = radio * (1 - np.cos(np.radians(inc)))
+        d_norte = norte_objetivo[indices] - caida * np.cos(np.radians(azi)) - norte
+        d_este = este_objetivo[indices] - caida * np.sin(np.radians(azi)) - este
+        d_tvd = tvd_objetivo[indices] - kop[indices] - radio * np.sin(np.radians(inc)) - tvd
+        horizontal = np.hypot(d_norte, d_este)
+        r_azimut = (np.degrees(np.arctan2(d_este, d_norte)) - azi + 180) % 360 - 180
+        r_inclinacion = np.degrees(np.arctan2(horizontal, d_tvd)) - inc
+        return r_azimut, r_inclinacion, np.hypot(horizontal, d_tvd)
+
+    # Incógnitas: inclinación de la tangente y giro con signo desde el azimut de
+    # superficie, que puede superar 180° cuando el objetivo queda detrás del KOP
+    inc = inclinacion_plano.copy()
+    giro = (azimut_objetivo - azimut_superficie + 180) % 360 - 180
+    todos = np.arange(len(inc))
+    h = 1e-5
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_a, r_i, _ = residuos(inc, giro, todos)
+        for _ in range(iteraciones):
+            # Solo se itera sobre los pozos que aún no convergen
+            activo = todos[(np.hypot(r_a, r_i) >= tolerancia) & np.isfinite(r_a) & np.isfinite(r_i)]
+            if not activo.size:
+                break
+            m = activo.size
+            d_a, d_i, _ = residuos(np.concatenate([inc[activo] + h, inc[activo]]),
+                                   np.concatenate([giro[activo], giro[activo] + h]), np.tile(activo, 2))
+            a0, i0 = r_a[activo], r_i[activo]
+            j_ii, j_ai = (d_i[:m] - i0) / h, (d_a[:m] - a0) / h
+            j_ig, j_ag = (d_i[m:] - i0) / h, (d_a[m:] - a0) / h
+            determinante = j_ii * j_ag - j_ig * j_ai
+            inc[activo] += np.clip(-(j_ag * i0 - j_ig * a0) / determinante, -10, 10)
+            giro[activo] += np.clip(-(j_ii * a0 - j_ai * i0) / determinante, -30, 30)
+            r_a[activo], r_i[activo], _ = residuos(inc[activo], giro[activo], activo)
+
+        r_a, r_i, longitud_tangente = residuos(inc, giro, todos)
+
+    # Sin desplazamiento o sin inclinación en el plano no hay curva ni giro que resolver
+    plano = (inclinacion_plano < 1e-9) | (desplazamiento <= 0)
+    convergido = plano | ((np.hypot(r_a, r_i) < 1e-6) & (inc > 0) & (inc < 90) & (np.abs(giro) < 360))
+    inc = np.where(plano, 0.0, inc)
+    giro = np.where(plano, 0.0, giro)
+    longitud_tangente = np.where(plano, tvd_objetivo - kop, longitud_tangente)
+    _, giro_insuficiente = _giro(0.0, inc * 100 / bur, azimut_superficie, giro, tasa_giro)
+
+    return {
+        'inclinacion': inc,
+        'azimut': (azimut_superficie + giro) % 360,
+        'sentido_giro': np.sign(giro),
+        'longitud_tangente': longitud_tangente,
+        'convergido': convergido & np.isfinite(longitud_tangente),
+        'giro_insuficiente': giro_insuficiente & ~plano
+    }
+
+
+def error_objetivo(perfil, norte, este, tvd):
+    """
+    Distancia 3D en pies entre la última estación de cada perfil y el punto
+    (norte, este, tvd), para comprobar que el pozo dibujado llega al objetivo.
+    """
+    return np.sqrt((perfil['norte'][:, -1] - norte) ** 2 + (perfil['este'][:, -1] - este) ** 2
+                   + (perfil['tvd'][:, -1] - tvd) ** 2)
+
+
+def perfil_a_dataframe(perfil, nombres_secciones=None, incluir_pozo=True):
+    """
+    Convierte un perfil de `perfil_direccional` en un DataFrame en formato
+    largo (una fila por estación y pozo), listo para graficar con Plotly.
+
+    Parámetros:
+    ----------
+    perfil : dict
+        Resultado de `perfil_direccional`.
+    nombres_secciones : dict, opcional
+        Renombra las secciones (por ejemplo {'Incremento': 'Cuerda'}).
+    incluir_pozo : bool
+        Si es False se omite la columna Pozo (perfiles de un solo pozo).
+
+    Retorna:
+    --------
+    pd.DataFrame:
+        Columnas Pozo, MD, Inclinación, Azimut, Norte, Este, TVD y Sección.
+    """
+    n_pozos, n_estaciones = perfil['md'].shape
+    seccion = perfil['seccion']
+    if nombres_secciones:
+        # Se renombran solo los nombres distintos y se expanden por índice
+        unicos, indices = np.unique(seccion, return_inverse=True)
+        seccion = np.array([nombres_secciones.get(nombre, nombre) for nombre in unicos], dtype=object)[indices]
+    columnas = {}
+    if incluir_pozo:
+        columnas['Pozo'] = np.repeat(np.arange(1, n_pozos + 1), n_estaciones)
+    columnas.update({
+        'MD': perfil['md'].ravel(),
+        'Inclinación': perfil['inclinacion'].ravel(),
+        'Azimut': perfil['azimut'].ravel(),
+        'Norte': perfil['norte'].ravel(),
+        'Este': perfil['este'].ravel(),
+        'TVD': perfil['tvd'].ravel(),
+        'Sección': np.tile(seccion, n_pozos)
+    })
+    return pd.DataFrame(columnas)
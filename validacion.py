@@ -0,0 +1,249 @@
+#-----------------Validación de Parámetros de Pozo -------------------#
+# Capa de validación previa a los cálculos de los pozos tipo J y S. Cada
+# conjunto de entradas se clasifica con operaciones enmascaradas sobre
+# arreglos (sin bifurcaciones ni excepciones por caso), de modo que las
+# corridas masivas detectan las combinaciones no válidas antes de calcular
+# y nunca producen trayectorias con NaN silenciosos. Las funciones aceptan
+# escalares o arreglos y devuelven un código por cada conjunto de entradas.
+import numpy as np
+import pandas as pd
+
+import trayectoria_3d
+
+# Códigos de diagnóstico, en orden de prioridad de evaluación
+FACTIBLE = 0
+ENTRADA_NO_FINITA = 1
+TASA_NO_POSITIVA = 2
+KOP_MAYOR_TVD = 3
+KOP_IGUAL_TVD = 4
+D3_NO_MENOR_D4 = 5
+D4_NO_MENOR_TVD = 6
+ARCCOS_FUERA_DOMINIO = 7
+OBJETIVO_INALCANZABLE = 8
+INCREMENTO_EXCEDE_D3 = 9
+RESULTADO_NO_FINITO = 10
+GIRO_INSUFICIENTE = 11
+GIRO_SIN_SOLUCION = 12
+
+# Nombre corto de cada código, útil para agrupar resultados de corridas masivas
+ESTADOS = {
+    FACTIBLE: 'factible',
+    ENTRADA_NO_FINITA: 'entrada_no_finita',
+    TASA_NO_POSITIVA: 'tasa_no_positiva',
+    KOP_MAYOR_TVD: 'kop_mayor_tvd',
+    KOP_IGUAL_TVD: 'kop_igual_tvd',
+    D3_NO_MENOR_D4: 'd3_no_menor_d4',
+    D4_NO_MENOR_TVD: 'd4_no_menor_tvd',
+    ARCCOS_FUERA_DOMINIO: 'arccos_fuera_dominio',
+    OBJETIVO_INALCANZABLE: 'objetivo_inalcanzable',
+    INCREMENTO_EXCEDE_D3: 'incremento_excede_d3',
+    RESULTADO_NO_FINITO: 'resultado_no_finito',
+    GIRO_INSUFICIENTE: 'giro_insuficiente',
+    GIRO_SIN_SOLUCION: 'giro_sin_solucion',
+}
+
+# Mensaje para el usuario de cada código
+MENSAJES = {
+    FACTIBLE: 'Parámetros válidos.',
+    ENTRADA_NO_FINITA: 'Los parámetros ingresados deben ser números finitos.',
+    TASA_NO_POSITIVA: 'Las tasas de incremento y disminución deben ser mayores que cero.',
+    KOP_MAYOR_TVD: 'El KOP debe ser menor que la profundidad al final de la curva.',
+    KOP_IGUAL_TVD: 'El KOP coincide con la profundidad al final de la curva; no hay sección para construir ángulo.',
+    D3_NO_MENOR_D4: 'D3 debe ser menor que D4.',
+    D4_NO_MENOR_TVD: 'D4 debe ser menor que TVD.',
+    ARCCOS_FUERA_DOMINIO: 'Parámetros no válidos. Por favor, incremente el BUR o ajuste los valores ingresados.',
+    OBJETIVO_INALCANZABLE: 'El objetivo no es alcanzable con este perfil: la inclinación requerida no está entre 0° y 90°.',
+    INCREMENTO_EXCEDE_D3: 'La sección de incremento termina por debajo de D3; reduzca D3 o incremente el BUR.',
+    RESULTADO_NO_FINITO: 'Los cálculos producen valores no finitos con estos parámetros.',
+    GIRO_INSUFICIENTE: 'La tasa de giro no alcanza el azimut de la tangente antes del final del incremento; auméntela o use 0 para calcularla.',
+    GIRO_SIN_SOLUCION: 'Con este cambio de azimut ninguna tangente llega al objetivo; reduzca el giro o incremente el BUR.',
+}
+
+
+# Tolerancia (en grados) en los límites de 0° y 90° de la inclinación, para que
+# el error de redondeo de las funciones trigonométricas (p. ej. -1e-15° con
+# desplazamiento 0) no cambie el diagnóstico según el BUR
+TOLERANCIA_ANGULO = 1e-9
+
+
+def _clasificar(condiciones):
+    # El primer código cuya condición se cumple gana; sin condiciones, el caso es factible
+    codigos, mascaras = zip(*condiciones)
+    return np.select(mascaras, codigos, default=FACTIBLE).astype(np.int8)
+
+
+def _resolver_giro(candidatos, kop, tasa_incremento, tvd_objetivo, desplazamiento, azimut_superficie,
+                   azimut_objetivo, inclinacion, tasa_giro, tasa_disminucion=None):
+    # Con giro, la tangente que llega al objetivo no es la del plano: se resuelve
+    # el perfil 3D solo para los candidatos (entradas válidas en el plano y con
+    # cambio de azimut) y se devuelven la inclinación resuelta y las máscaras de
+    # objetivo sin solución y de tasa de giro insuficiente
+    sin_solucion = np.zeros(candidatos.shape, dtype=bool)
+    giro_insuficiente = np.zeros(candidatos.shape, dtype=bool)
+    inclinacion = np.array(inclinacion, dtype=float)
+    if np.any(candidatos):
+        solucion = trayectoria_3d.resolver_objetivo(
+            kop[candidatos], tasa_incremento[candidatos], tvd_objetivo[candidatos],
+            desplazamiento[candidatos], azimut_objetivo[candidatos], inclinacion[candidatos],
+            azimut_superficie[candidatos], tasa_giro[candidatos],
+            dor=None if tasa_disminucion is None else tasa_disminucion[candidatos]
+        )
+        sin_solucion[candidatos] = ~solucion['convergido']
+        giro_insuficiente[candidatos] = solucion['giro_insuficiente']
+        inclinacion[candidatos] = np.where(solucion['convergido'], solucion['inclinacion'], inclinacion[candidatos])
+    return inclinacion, sin_solucion, giro_insuficiente
+
+
+def _con_giro(desplazamiento, azimut_superficie, azimut_objetivo):
+    # Cambio de azimut entre el KOP y el objetivo (sin desplazamiento no hay giro)
+    return (desplazamiento > 0) & ((azimut_objetivo - azimut_superficie + 180) % 360 - 180 != 0)
+
+
+def clasificar_pozo_j(bur, tvd, kop, desplazamiento_horizontal,
+                      azimut_superficie=0.0, azimut_objetivo=0.0, tasa_giro=0.0):
+    """
+    Clasifica uno o varios conjuntos de entradas del pozo tipo J antes de calcular.
+
+    Parámetros:
+    ----------
+    bur : float o np.ndarray
+        Build-Up Rate (BUR) en grados por cada 100 ft.
+    tvd : float o np.ndarray
+        True Vertical Depth (TVD) en pies.
+    kop : float o np.ndarray
+        Kick-Off Point (KOP) en pies.
+    desplazamiento_horizontal : float o np.ndarray
+        Desplazamiento horizontal del pozo en pies.
+    azimut_superficie, azimut_objetivo : float o np.ndarray
+        Azimut en el KOP y azimut hacia el objetivo, en grados.
+    tasa_giro : float o np.ndarray
+        Tasa de giro en grados por cada 100 ft (0 = automática).
+
+    Retorna:
+    --------
+    np.ndarray:
+        Código de diagnóstico (int8) por conjunto de entradas, con la forma
+        conjunta de los parámetros (0-d para entradas escalares).
+    """
+    bur, tvd, kop, d, azs, azo, giro = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (
+        bur, tvd, kop, desplazamiento_horizontal, azimut_superficie, azimut_objetivo, tasa_giro
+    )))
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        h = tvd - kop
+        radio = (180 * 100) / (3.141593 * bur)
+        hipotenusa = np.hypot(d - radio, h)
+        # Inclinación de calculos_trigonometricos sin bifurcar por radio <> desplazamiento
+        inclinacion = 90 + np.degrees(np.arctan((d - radio) / h)) - np.degrees(np.arccos(radio / hipotenusa))
+
+    condiciones = [
+        (ENTRADA_NO_FINITA, ~np.logical_and.reduce([np.isfinite(v) for v in (bur, tvd, kop, d, azs, azo, giro)])),
+        (TASA_NO_POSITIVA, bur <= 0),
+        (KOP_MAYOR_TVD, h < 0),
+        (KOP_IGUAL_TVD, h == 0),
+        (ARCCOS_FUERA_DOMINIO, radio > hipotenusa),
+        (OBJETIVO_INALCANZABLE, (inclinacion < -TOLERANCIA_ANGULO) | (inclinacion > 90 + TOLERANCIA_ANGULO)),
+        (RESULTADO_NO_FINITO, ~np.isfinite(inclinacion)),
+    ]
+    # Válido en el plano: ninguna de las condiciones anteriores se cumple
+    candidatos = ~np.logical_or.reduce([mascara for _, mascara in condiciones]) & _con_giro(d, azs, azo)
+    _, sin_solucion, giro_insuficiente = _resolver_giro(candidatos, kop, bur, tvd, d, azs, azo, inclinacion, giro)
+
+    return _clasificar(condiciones + [
+        (GIRO_SIN_SOLUCION, sin_solucion),
+        (GIRO_INSUFICIENTE, giro_insuficiente),
+    ])
+
+
+def theta_pozo_s(BUR, DOR, KOP, D4, x4):
+    """
+    Ángulo de inclinación theta (en radianes) del pozo tipo S, sin bifurcar
+    por `r1 + r2 > x4`: arctan2 cubre ambos casos de la fórmula original.
+    Devuelve NaN donde arccos queda fuera de su dominio.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r1 = 180 / (np.pi * BUR / 100)
+        r2 = 180 / (np.pi * DOR / 100)
+        term1 = np.arctan2(D4 - KOP, r1 + r2 - x4)
+        term2 = np.arccos((r1 + r2) / (D4 - KOP) * np.sin(term1))
+    return term1 - term2
+
+
+def clasificar_pozo_s(BUR, DOR, KOP, D3, D4, TVD, x4,
+                      azimut_superficie=0.0, azimut_objetivo=0.0, tasa_giro=0.0):
+    """
+    Clasifica uno o varios conjuntos de entradas del pozo tipo S antes de calcular.
+
+    Parámetros:
+    ----------
+    BUR, DOR : float o np.ndarray
+        Tasas de incremento y disminución en grados por cada 100 ft.
+    KOP, D3, D4, TVD : float o np.ndarray
+        Kick-Off Point y profundidades verticales en pies.
+    x4 : float o np.ndarray
+        Desplazamiento horizontal al objetivo en pies.
+    azimut_superficie, azimut_objetivo : float o np.ndarray
+        Azimut en el KOP y azimut hacia el objetivo, en grados.
+    tasa_giro : float o np.ndarray
+        Tasa de giro en grados por cada 100 ft (0 = automática).
+
+    Retorna:
+    --------
+    np.ndarray:
+        Código de diagnóstico (int8) por conjunto de entradas.
+    """
+    BUR, DOR, KOP, D3, D4, TVD, x4, azs, azo, giro = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (BUR, DOR, KOP, D3, D4, TVD, x4,
+                                               azimut_superficie, azimut_objetivo, tasa_giro))
+    )
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        r1 = 180 / (np.pi * BUR / 100)
+        r2 = 180 / (np.pi * DOR / 100)
+        term1 = np.arctan2(D4 - KOP, r1 + r2 - x4)
+        argumento = (r1 + r2) / (D4 - KOP) * np.sin(term1)
+        theta = theta_pozo_s(BUR, DOR, KOP, D4, x4)
+
+    entradas = (BUR, DOR, KOP, D3, D4, TVD, x4, azs, azo, giro)
+    condiciones = [
+        (ENTRADA_NO_FINITA, ~np.logical_and.reduce([np.isfinite(v) for v in entradas])),
+        (TASA_NO_POSITIVA, (BUR <= 0) | (DOR <= 0)),
+        (D3_NO_MENOR_D4, D3 >= D4),
+        (D4_NO_MENOR_TVD, D4 >= TVD),
+        (KOP_MAYOR_TVD, KOP > D4),
+        (KOP_IGUAL_TVD, KOP == D4),
+        (ARCCOS_FUERA_DOMINIO, np.abs(argumento) > 1),
+        (OBJETIVO_INALCANZABLE, (theta < -np.radians(TOLERANCIA_ANGULO)) | (theta >= np.pi / 2)),
+        (RESULTADO_NO_FINITO, ~np.isfinite(theta)),
+    ]
+    # Con giro, el final del incremento se evalúa con la inclinación resuelta en 3D
+    candidatos = ~np.logical_or.reduce([mascara for _, mascara in condiciones]) & _con_giro(x4, azs, azo)
+    inclinacion, sin_solucion, giro_insuficiente = _resolver_giro(
+        candidatos, KOP, BUR, D4, x4, azs, azo, np.degrees(theta), giro, DOR
+    )
+    with np.errstate(invalid='ignore'):
+        D2 = KOP + r1 * np.sin(np.radians(inclinacion))
+
+    # INCREMENTO_EXCEDE_D3 se evalúa antes que RESULTADO_NO_FINITO, como en el plano
+    condiciones.insert(-1, (INCREMENTO_EXCEDE_D3, D2 > D3))
+    return _clasificar(condiciones + [
+        (GIRO_SIN_SOLUCION, sin_solucion),
+        (GIRO_INSUFICIENTE, giro_insuficiente),
+    ])
+
+
+def diagnostico(codigos):
+    """
+    Convierte códigos de diagnóstico en una tabla estructurada para reportes
+    de corridas masivas.
+
+    Retorna:
+    --------
+    pd.DataFrame:
+        Columnas codigo, estado, mensaje y factible, una fila por código.
+    """
+    codigos = np.atleast_1d(codigos).ravel()
+    return pd.DataFrame({
+        'codigo': codigos,
+        'estado': [ESTADOS[int(c)] for c in codigos],
+        'mensaje': [MENSAJES[int(c)] for c in codigos],
+        'factible': codigos == FACTIBLE,
+    })